@@ -12,6 +12,9 @@ class Settings(BaseSettings):
     # Server Configuration
     host: str = "0.0.0.0"
     port: int = 8000
+
+    # CORS Configuration (liste vide = middleware CORS non monté)
+    cors_origins: List[str] = ["http://localhost:3000"]
     
     # Database Configuration (Azure PostgreSQL)
     db_host: Optional[str] = None
@@ -63,6 +66,7 @@ class Settings(BaseSettings):
     queue_retry_delay_seconds: int = 30
     queue_processing_timeout_seconds: int = 300
     redis_ttl: int = 24 # Time before deleting job data (in hours)
+    token_blacklist_timeout_seconds: float = 0.25 # Connexion/lecture Redis de la liste de révocation, sur le chemin de chaque requête
 
     # Batch Processing Configuration
     batch_max_retries: int = 3
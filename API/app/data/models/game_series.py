@@ -2,7 +2,7 @@ from uuid import UUID, uuid4
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Text
+from sqlalchemy import String, DateTime, Text, UniqueConstraint
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 
 from app.data.connection import Base
@@ -12,6 +12,7 @@ class GameSeriesModel(Base):
     """SQLAlchemy model for game series"""
 
     __tablename__ = 'game_series'
+    __table_args__ = (UniqueConstraint('title', name='uq_game_series_title'),)
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
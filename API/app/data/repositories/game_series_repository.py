@@ -2,6 +2,7 @@ from typing import Optional, List
 from uuid import UUID
 
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.data.models import GameSeriesModel
@@ -20,8 +21,13 @@ class GameSeriesRepository(IGameSeriesRepository):
             publisher=game_series.publisher,
             description=game_series.description,
         )
-        self._session.add(model)
-        await self._session.flush()
+        try:
+            # Savepoint: une violation d'unicité n'invalide pas la transaction englobante
+            async with self._session.begin_nested():
+                self._session.add(model)
+                await self._session.flush()
+        except IntegrityError as e:
+            raise ValueError(f"Game series with this title already exists: {e}")
         return self._model_to_entity(model)
 
     async def get_by_id(self, series_id: UUID) -> Optional[GameSeries]:
@@ -2,7 +2,7 @@
 from .database import get_db_session
 
 # Services
-from .services import get_password_service, get_jwt_service, get_blob_storage_service, get_queue_service, get_ai_processing_service
+from .services import get_password_service, get_jwt_service, get_blob_storage_service, get_queue_service, get_ai_processing_service, get_token_blacklist_service
 
 # Repositories
 from .repositories import (
@@ -31,6 +31,7 @@ __all__ = [
     "get_db_session",
     # Services
     "get_password_service", "get_jwt_service", "get_blob_storage_service", "get_queue_service", "get_ai_processing_service",
+    "get_token_blacklist_service",
     # Repositories
     "get_user_repository", "get_game_repository", "get_game_series_repository",
     "get_game_image_repository", "get_game_vector_repository", "get_user_session_repository",
@@ -1,20 +1,51 @@
+import logging
+from typing import Any, Dict, Optional
+from uuid import UUID
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.dependencies.repositories import get_user_repository, get_user_session_repository
-from app.dependencies.services import get_jwt_service
+from app.dependencies.services import get_jwt_service, get_token_blacklist_service
 from app.domain.entities.user import User
 from app.domain.ports.repositories.user_repository import IUserRepository
 from app.domain.ports.repositories.user_session_repository import IUserSessionRepository
 from app.domain.ports.services.jwt_service import IJWTService
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+
+async def _is_token_revoked(blacklist: ITokenBlacklistService, payload: Dict[str, Any]) -> Optional[bool]:
+  """Consulte la liste de révocation ; None si elle ne peut pas répondre (Redis indisponible, token sans sid)"""
+  session_id = payload.get("sid")
+  issued_at = payload.get("iat")
+  if session_id is None or issued_at is None:
+      # Token émis avant l'ajout du claim de session
+      return None
+  try:
+      return await blacklist.is_revoked(session_id, payload["sub"], float(issued_at))
+  except Exception as e:
+      logger.warning(f"Token blacklist unavailable, falling back to session check: {e}")
+      return None
+
+
+async def _has_valid_session(session_repo: IUserSessionRepository, payload: Dict[str, Any], user_id: UUID) -> bool:
+  """Vérifie en base la session du token (ou, sans claim de session, qu'il en reste une active)"""
+  session_id = payload.get("sid")
+  if session_id is None:
+      return await session_repo.count_active_sessions_for_user(user_id) > 0
+  session = await session_repo.find_by_id(UUID(session_id))
+  return session is not None and session.user_id == user_id and session.is_valid()
+
 async def get_current_user(
   credentials: HTTPAuthorizationCredentials = Depends(security),
   user_repo: IUserRepository = Depends(get_user_repository),
   session_repo: IUserSessionRepository = Depends(get_user_session_repository),
-  jwt_service: IJWTService = Depends(get_jwt_service)
+  jwt_service: IJWTService = Depends(get_jwt_service),
+  blacklist: ITokenBlacklistService = Depends(get_token_blacklist_service)
 ) -> User:
   """Dependency to get current authenticated user from JWT token"""
   credentials_exception = HTTPException(
@@ -30,8 +61,14 @@ async def get_current_user(
 
   try:
       token = credentials.credentials
-      user_id = jwt_service.get_user_id_from_token(token)
-      if user_id is None:
+      payload = jwt_service.verify_access_token(token)
+      if payload is None or payload.get("sub") is None:
+          raise credentials_exception
+      user_id = UUID(payload["sub"])
+
+      # Token révoqué (logout) : rejet sans aller-retour en base
+      revoked = await _is_token_revoked(blacklist, payload)
+      if revoked:
           raise credentials_exception
 
       user = await user_repo.find_by_id(user_id)
@@ -41,8 +78,8 @@ async def get_current_user(
       if not user.is_active:
           raise not_activated_exception
 
-      active_sessions_count = await session_repo.count_active_sessions_for_user(user_id)
-      if active_sessions_count == 0:
+      # La liste de révocation n'a pas pu répondre : la base reste la source de vérité
+      if revoked is None and not await _has_valid_session(session_repo, payload, user_id):
           raise credentials_exception
 
       return user
@@ -1,13 +1,17 @@
+from functools import lru_cache
+
 from fastapi import Depends
 
 from app.domain.ports.services.jwt_service import IJWTService
 from app.domain.ports.services.password_service import IPasswordService
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
 from app.domain.ports.services.vector_search_service import IVectorSearchService
 from app.domain.ports.services.game_rules_agent import IGameRulesAgent
 from app.services.password_service import PasswordService
 from app.services.jwt_service import JWTService
 from app.services.blob_storage_service import AzureBlobStorageService
 from app.services.redis_queue_service import RedisQueueService
+from app.services.token_blacklist_service import RedisTokenBlacklistService
 from app.services.openai_processing_service import OpenAIProcessingService
 from app.services.vector_search_service import VectorSearchService
 from app.services.game_rules_agent import GameRulesAgent
@@ -18,10 +22,14 @@ from app.domain.ports.repositories.chat_message_repository import IChatMessageRe
 from app.domain.ports.repositories.game_image_repository import IGameImageRepository
 from app.domain.ports.repositories.chat_feedback_repository import IChatFeedbackRepository
 
+# Services sans état : une seule instance par processus (les use cases, eux,
+# restent construits par requête car leurs repositories sont liés à la session DB)
+@lru_cache
 def get_password_service() -> IPasswordService:
   """Factory for PasswordService"""
   return PasswordService()
 
+@lru_cache
 def get_jwt_service() -> IJWTService:
   """Factory for JWTService"""
   return JWTService()
@@ -30,6 +38,7 @@ def get_jwt_service() -> IJWTService:
 _blob_service = None
 _queue_service = None
 _ai_service = None
+_token_blacklist_service = None
 
 def get_blob_storage_service() -> AzureBlobStorageService:
   """Dépendance pour le service Azure Blob Storage"""
@@ -45,6 +54,13 @@ def get_queue_service() -> RedisQueueService:
       _queue_service = RedisQueueService()
   return _queue_service
 
+def get_token_blacklist_service() -> ITokenBlacklistService:
+  """Dépendance pour la liste de révocation des access tokens (Redis)"""
+  global _token_blacklist_service
+  if _token_blacklist_service is None:
+      _token_blacklist_service = RedisTokenBlacklistService()
+  return _token_blacklist_service
+
 def get_ai_processing_service() -> OpenAIProcessingService:
   """Dépendance pour le service IA OpenAI"""
   global _ai_service
@@ -5,10 +5,11 @@ from app.dependencies.repositories import (
   get_user_session_repository,
   get_chat_conversation_repository, get_chat_message_repository, get_chat_feedback_repository
 )
-from app.dependencies.services import get_password_service, get_jwt_service, get_game_rules_agent, get_conversation_history_service, get_blob_storage_service
+from app.dependencies.services import get_password_service, get_jwt_service, get_token_blacklist_service, get_game_rules_agent, get_conversation_history_service, get_blob_storage_service
 from app.domain.ports.repositories.user_session_repository import IUserSessionRepository
 from app.domain.ports.services.jwt_service import IJWTService
 from app.domain.ports.services.password_service import IPasswordService
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
 from app.domain.use_cases.auth.logout_user import LogoutUser
 from app.domain.use_cases.auth.refresh_token import RefreshToken
 
@@ -61,18 +62,20 @@ def get_authenticate_user_use_case(
 def get_refresh_token_use_case(
   user_repo: IUserRepository = Depends(get_user_repository),
   session_repo: IUserSessionRepository = Depends(get_user_session_repository),
-jwt_service: IJWTService = Depends(get_jwt_service)
+jwt_service: IJWTService = Depends(get_jwt_service),
+  token_blacklist: ITokenBlacklistService = Depends(get_token_blacklist_service)
 ) -> RefreshToken:
   """Factory pour RefreshToken use case"""
-  return RefreshToken(user_repo, session_repo, jwt_service)
+  return RefreshToken(user_repo, session_repo, jwt_service, token_blacklist)
 
 
 def get_logout_user_use_case(
   session_repo: IUserSessionRepository = Depends(get_user_session_repository),
-  jwt_service: IJWTService = Depends(get_jwt_service)
+  jwt_service: IJWTService = Depends(get_jwt_service),
+  token_blacklist: ITokenBlacklistService = Depends(get_token_blacklist_service)
 ) -> LogoutUser:
   """Factory pour LogoutUser use case"""
-  return LogoutUser(session_repo, jwt_service)
+  return LogoutUser(session_repo, jwt_service, token_blacklist)
 
 
 # Game Use Cases
@@ -43,12 +43,13 @@ class GameImage:
         original_filename: str,
         file_size: int,
         uploaded_by: UUID,
-        batch_id: Optional[UUID] = None
+        batch_id: Optional[UUID] = None,
+        image_id: Optional[UUID] = None
     ) -> 'GameImage':
         """Creates a new game image"""
 
         return cls(
-            id=uuid4(),
+            id=image_id or uuid4(),
             game_id=game_id,
             file_path=file_path,
             blob_url=blob_url,
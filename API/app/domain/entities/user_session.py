@@ -23,12 +23,13 @@ class UserSession:
         user_id: UUID,
         refresh_token_hash: str,
         expires_at: datetime,
-        device_info: Optional[Dict[str, Any]] = None
+        device_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[UUID] = None
     ) -> "UserSession":
-        """Creates a new user session"""
+        """Creates a new user session (session_id fourni quand les tokens le référencent déjà)"""
 
         return cls(
-            id=uuid4(),
+            id=session_id or uuid4(),
             user_id=user_id,
             refresh_token_hash=refresh_token_hash,
             device_info=device_info or {},
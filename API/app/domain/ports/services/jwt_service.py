@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Tuple
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from uuid import UUID
 
 
@@ -8,17 +8,33 @@ class IJWTService(ABC):
     """Interface pour les services de gestion des tokens JWT"""
 
     @abstractmethod
-    def create_token_pair(self, user_id: UUID, username: str, email: str) -> Tuple[str, str, str, int, int]:
+    def create_token_pair(
+        self,
+        user_id: UUID,
+        username: str,
+        email: str,
+        session_id: Optional[UUID] = None,
+        session_expires_at: Optional[datetime] = None
+    ) -> Tuple[str, str, str, int, int]:
         """
         Crée une paire de tokens (access + refresh)
 
+        L'access token porte l'ID de session (claim "sid") et n'expire pas après la session
+
         Returns:
             Tuple[access_token, refresh_token, refresh_token_hash, access_expires_in, refresh_expires_in]
         """
         pass
 
     @abstractmethod
-    def _create_access_token(self, user_id: UUID, username: str, email: str) -> str:
+    def _create_access_token(
+        self,
+        user_id: UUID,
+        username: str,
+        email: str,
+        session_id: Optional[UUID] = None,
+        expires_delta: Optional[timedelta] = None
+    ) -> str:
         """Creates an access token"""
         pass
 
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+
+
+class ITokenBlacklistService(ABC):
+  """Interface pour la liste de révocation des access tokens (par session, ou tous ceux d'un utilisateur)"""
+
+  @abstractmethod
+  async def revoke_session(self, session_id: str, expires_in: int) -> None:
+      """Révoque les access tokens d'une session, pour la durée de vie d'un access token (en secondes)"""
+      pass
+
+  @abstractmethod
+  async def revoke_all_for_user(self, user_id: str, issued_before: float, expires_in: int) -> None:
+      """Révoque les access tokens d'un utilisateur émis avant `issued_before` (timestamp)"""
+      pass
+
+  @abstractmethod
+  async def is_revoked(self, session_id: str, user_id: str, issued_at: float) -> bool:
+      """Indique si un access token a été révoqué, avec sa session ou avec tous ceux de l'utilisateur"""
+      pass
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
+from uuid import uuid4
 
 from app.domain.entities.user import User
 from app.domain.entities.user_session import UserSession
@@ -73,16 +74,22 @@ class AuthenticateUser:
         if not self._password_service.verify_password(request.password, user.hashed_password):
             raise InvalidCredentialsError("Invalid username/email or password")
 
-        # Générer les tokens JWT
+        # Générer les tokens JWT ; l'access token référence la session créée juste après
+        session_id = uuid4()
+        session_expires_at = self._jwt_service.get_refresh_token_expiry()
         access_token, refresh_token, refresh_token_hash, access_expires_in, refresh_expires_in = \
-            self._jwt_service.create_token_pair(user.id, user.username, user.email)
+            self._jwt_service.create_token_pair(
+                user.id, user.username, user.email,
+                session_id=session_id, session_expires_at=session_expires_at
+            )
 
         # Créer une nouvelle session
         session = UserSession.create(
             user_id=user.id,
             refresh_token_hash=refresh_token_hash,
-            expires_at=self._jwt_service.get_refresh_token_expiry(),
-            device_info=request.device_info
+            expires_at=session_expires_at,
+            device_info=request.device_info,
+            session_id=session_id
         )
 
         # Sauvegarder la session
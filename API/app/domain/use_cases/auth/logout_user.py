@@ -3,7 +3,9 @@ from typing import Optional
 from uuid import UUID
 
 from app.domain.ports.services.jwt_service import IJWTService
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
 from app.domain.ports.repositories.user_session_repository import IUserSessionRepository
+from app.domain.use_cases.auth.session_revocation import revoke_session_tokens, revoke_user_tokens
 
 
 @dataclass
@@ -28,10 +30,12 @@ class LogoutUser:
     def __init__(
             self,
             session_repository: IUserSessionRepository,
-            jwt_service: IJWTService
+            jwt_service: IJWTService,
+            token_blacklist: ITokenBlacklistService
     ):
         self._session_repository = session_repository
         self._jwt_service = jwt_service
+        self._token_blacklist = token_blacklist
 
     async def execute(self, request: LogoutUserRequest, current_user_id: UUID) -> LogoutUserResponse:
         """Exécuter la déconnexion utilisateur"""
@@ -42,6 +46,7 @@ class LogoutUser:
         if request.logout_all:
             # Déconnecter toutes les sessions de l'utilisateur
             sessions_revoked = await self._session_repository.deactivate_all_user_sessions(current_user_id)
+            await revoke_user_tokens(self._token_blacklist, current_user_id)
             return LogoutUserResponse(
                 success=True,
                 sessions_revoked=sessions_revoked,
@@ -60,6 +65,8 @@ class LogoutUser:
                 )
 
             success = await self._session_repository.deactivate_session(request.session_id)
+            if success:
+                await revoke_session_tokens(self._token_blacklist, request.session_id)
             return LogoutUserResponse(
                 success=success,
                 sessions_revoked=1 if success else 0,
@@ -79,6 +86,8 @@ class LogoutUser:
                 )
 
             success = await self._session_repository.deactivate_session(session.id)
+            if success:
+                await revoke_session_tokens(self._token_blacklist, session.id)
             return LogoutUserResponse(
                 success=success,
                 sessions_revoked=1 if success else 0,
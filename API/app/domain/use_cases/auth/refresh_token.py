@@ -4,6 +4,8 @@ from typing import Optional, Any, Dict
 from app.domain.ports.repositories.user_repository import IUserRepository
 from app.domain.ports.repositories.user_session_repository import IUserSessionRepository
 from app.domain.ports.services.jwt_service import IJWTService
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
+from app.domain.use_cases.auth.session_revocation import revoke_session_tokens
 
 
 @dataclass
@@ -43,11 +45,13 @@ class RefreshToken:
       self,
       user_repository: IUserRepository,
       session_repository: IUserSessionRepository,
-      jwt_service: IJWTService
+      jwt_service: IJWTService,
+      token_blacklist: ITokenBlacklistService
   ):
       self._user_repository = user_repository
       self._session_repository = session_repository
       self._jwt_service = jwt_service
+      self._token_blacklist = token_blacklist
 
   async def execute(self, request: RefreshTokenRequest) -> RefreshTokenResponse:
       """Exécuter le rafraîchissement du token"""
@@ -67,6 +71,7 @@ class RefreshToken:
       if not session.is_valid():
           # Nettoyer la session expirée/inactive
           await self._session_repository.deactivate_session(session.id)
+          await revoke_session_tokens(self._token_blacklist, session.id)
 
           if session.is_expired():
               raise ExpiredRefreshTokenError("Refresh token has expired")
@@ -87,7 +92,10 @@ class RefreshToken:
 
       # Générer de nouveaux tokens (rotation du refresh token)
       access_token, new_refresh_token, new_refresh_hash, access_expires_in, refresh_expires_in = \
-          self._jwt_service.create_token_pair(user.id, user.username, user.email)
+          self._jwt_service.create_token_pair(
+              user.id, user.username, user.email,
+              session_id=session.id, session_expires_at=session.expires_at
+          )
 
       # Mettre à jour la session avec le nouveau refresh token
       session.refresh_token_hash = new_refresh_hash
@@ -0,0 +1,34 @@
+import logging
+from datetime import datetime, timezone
+from uuid import UUID
+
+from app.config import settings
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
+
+logger = logging.getLogger(__name__)
+
+
+def _access_token_ttl() -> int:
+    """Durée de vie d'un access token : au-delà, une entrée de révocation ne sert plus"""
+    return settings.jwt_access_token_expire_minutes * 60
+
+
+async def revoke_session_tokens(blacklist: ITokenBlacklistService, session_id: UUID) -> None:
+    """Révoque les access tokens d'une session qui vient d'être désactivée.
+
+    Au mieux : si Redis est indisponible, la session reste désactivée en base, mais ses
+    access tokens restent valides jusqu'à leur expiration une fois Redis revenu.
+    """
+    try:
+        await blacklist.revoke_session(str(session_id), _access_token_ttl())
+    except Exception as e:
+        logger.warning(f"Token blacklist unavailable, session {session_id} tokens not revoked: {e}")
+
+
+async def revoke_user_tokens(blacklist: ITokenBlacklistService, user_id: UUID) -> None:
+    """Révoque tous les access tokens déjà émis pour un utilisateur (logout global), au mieux"""
+    issued_before = datetime.now(timezone.utc).timestamp()
+    try:
+        await blacklist.revoke_all_for_user(str(user_id), issued_before, _access_token_ttl())
+    except Exception as e:
+        logger.warning(f"Token blacklist unavailable, user {user_id} tokens not revoked: {e}")
@@ -7,7 +7,7 @@ from app.domain.entities.game import Game
 from app.domain.ports.repositories.game_repository import IGameRepository
 from app.domain.ports.services.blob_storage_service import IBlobStorageService
 
-@dataclass
+@dataclass(slots=True)
 class CreateGameRequest:
   title: str
   description: Optional[str] = None
@@ -21,7 +21,7 @@ class CreateGameRequest:
   avatar_content: Optional[bytes] = None  # Contenu du fichier avatar
   avatar_filename: Optional[str] = None  # Nom du fichier original
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CreateGameResponse:
   game: Game | None
   success: bool
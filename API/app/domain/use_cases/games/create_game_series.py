@@ -6,13 +6,13 @@ from uuid import uuid4
 from app.domain.entities.game_series import GameSeries
 from app.domain.ports.repositories.game_series_repository import IGameSeriesRepository
 
-@dataclass
+@dataclass(slots=True)
 class CreateGameSeriesRequest:
   title: str
   publisher: Optional[str] = None
   description: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CreateGameSeriesResponse:
   series: Optional[GameSeries]
   success: bool
@@ -24,16 +24,7 @@ class CreateGameSeriesUseCase:
 
   async def execute(self, request: CreateGameSeriesRequest) -> CreateGameSeriesResponse:
       try:
-          # Vérifier si une série avec ce nom existe déjà
-          existing = await self._series_repository.get_by_name(request.title)
-          if existing:
-              return CreateGameSeriesResponse(
-                  series=None,
-                  success=False,
-                  message="A series with this name already exists"
-              )
-
-          # Créer la série
+          # Créer la série (unicité du titre garantie par la contrainte UNIQUE)
           series = GameSeries(
               id=uuid4(),
               title=request.title,
@@ -44,7 +35,14 @@ class CreateGameSeriesUseCase:
           )
 
           # Sauvegarder
-          created_series = await self._series_repository.create(series)
+          try:
+              created_series = await self._series_repository.create(series)
+          except ValueError:
+              return CreateGameSeriesResponse(
+                  series=None,
+                  success=False,
+                  message="A series with this name already exists"
+              )
 
           return CreateGameSeriesResponse(
               series=created_series,
@@ -11,9 +11,10 @@ from app.domain.ports.repositories.game_image_repository import IGameImageReposi
 from app.domain.ports.repositories.game_repository import IGameRepository
 from app.domain.ports.services.blob_storage_service import IBlobStorageService
 from app.domain.ports.services.queue_service import IQueueService
+from app.shared.utils.uuid_utils import uuid4_batch
 
 
-@dataclass
+@dataclass(slots=True)
 class CreateImageBatchRequest:
     """Request pour créer un batch d'images"""
     game_id: UUID
@@ -22,7 +23,7 @@ class CreateImageBatchRequest:
     user_is_admin: bool = False  # Privilèges admin pour upload
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CreateImageBatchResult:
     """Résultat de création de batch d'images"""
     success: bool
@@ -94,7 +95,10 @@ class CreateImageBatchUseCase:
             uploaded_images = []
             job_ids = []
 
-            for filename, content, size in request.image_files:
+            # Pré-générer tous les IDs d'images en un seul appel système
+            image_ids = uuid4_batch(len(request.image_files))
+
+            for (filename, content, size), image_id in zip(request.image_files, image_ids):
                 try:
                     # Créer d'abord l'entité GameImage pour avoir l'image_id
                     image_entity = GameImage.create(
@@ -104,7 +108,8 @@ class CreateImageBatchUseCase:
                         original_filename=filename,
                         file_size=size,
                         uploaded_by=request.user_id,
-                        batch_id=batch.id
+                        batch_id=batch.id,
+                        image_id=image_id
                     )
                     
                     # Upload vers Azure Blob avec la vraie méthode
@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 import uvicorn
@@ -7,15 +8,13 @@ from fastapi.logger import logger
 from starlette.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.data.connection import create_database_engine
+from app.data.connection import create_database_engine, close_database
+from app.dependencies.services import get_blob_storage_service, get_queue_service, get_ai_processing_service, get_token_blacklist_service
 from app.domain.use_cases.images.start_processing_worker import StartProcessingWorkerUseCase
 from app.presentation.routes.auth import router as auth_router
 from app.presentation.routes.games import router as games_router
 from app.presentation.routes.images import router as images_router
 from app.presentation.routes.chat import router as chat_router
-from app.services.blob_storage_service import AzureBlobStorageService
-from app.services.openai_processing_service import OpenAIProcessingService
-from app.services.redis_queue_service import RedisQueueService
 
 
 @asynccontextmanager
@@ -33,18 +32,15 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting GameAdvisor API v2...")
     worker_use_case = None
 
-    try:
-        print("Creating services...")
-        # Créer les services singletons
-        queue_service = RedisQueueService()
-        print("✅ RedisQueueService created")
-
-        blob_service = AzureBlobStorageService()
-        print("✅ AzureBlobStorageService created")
-
-        ai_service = OpenAIProcessingService()
-        print("✅ OpenAIProcessingService created")
+    # Services singletons partagés entre le worker et les requêtes HTTP
+    queue_service = get_queue_service()
+    blob_service = get_blob_storage_service()
+    ai_service = get_ai_processing_service()
+    app.state.queue_service = queue_service
+    app.state.blob_service = blob_service
+    app.state.ai_service = ai_service
 
+    try:
         print("Creating worker use case...")
         worker_use_case = StartProcessingWorkerUseCase(
             queue_service=queue_service,
@@ -82,6 +78,18 @@ async def lifespan(app: FastAPI):
         await worker_use_case.stop()
         logger.info("Image processing worker stopped")
 
+    # Libérer les pools de connexions (DB, Blob, Redis) une seule fois par processus
+    results = await asyncio.gather(
+        close_database(),
+        blob_service.close(),
+        queue_service.close(),
+        get_token_blacklist_service().close(),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error(f"Shutdown cleanup error: {result}")
+
 
 # Configure logging AVANT la création de l'app
 if settings.debug:
@@ -105,14 +113,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add CORS middleware  
-app.add_middleware(
-    CORSMiddleware,  # type: ignore
-    allow_origins=["*"],  # Configure as needed for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Add CORS middleware only when browser origins are configured
+if settings.cors_origins:
+    app.add_middleware(
+        CORSMiddleware,  # type: ignore
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["authorization", "content-type"],
+    )
 
 # Include routers
 app.include_router(auth_router)
@@ -154,5 +163,7 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
@@ -2,7 +2,7 @@ import hashlib
 import secrets
 from datetime import timedelta, datetime, timezone
 from typing import Optional, Dict, Any, Tuple, List
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from jose import jwt, JWTError
 
@@ -19,34 +19,60 @@ class JWTService(IJWTService):
         self._access_token_expire_minutes = settings.jwt_access_token_expire_minutes
         self._refresh_token_expire_days = settings.jwt_refresh_token_expire_days
 
-    def create_token_pair(self, user_id: UUID, username: str, email: str) -> Tuple[str, str, str, int, int]:
+    def create_token_pair(
+        self,
+        user_id: UUID,
+        username: str,
+        email: str,
+        session_id: Optional[UUID] = None,
+        session_expires_at: Optional[datetime] = None
+    ) -> Tuple[str, str, str, int, int]:
         """Creates an access token + refresh token pair"""
 
-        access_token = self._create_access_token(user_id, username, email)
+        # Calculate expiration (in seconds) ; l'access token ne survit pas à sa session
+        access_expires_in = self._access_token_expire_minutes * 60
+        if session_expires_at is not None:
+            if session_expires_at.tzinfo is None:
+                session_expires_at = session_expires_at.replace(tzinfo=timezone.utc)
+            session_remaining = int((session_expires_at - datetime.now(timezone.utc)).total_seconds())
+            access_expires_in = max(0, min(access_expires_in, session_remaining))
+        refresh_expires_in = self._refresh_token_expire_days * 86400
+
+        access_token = self._create_access_token(
+            user_id, username, email, session_id, timedelta(seconds=access_expires_in)
+        )
 
         refresh_token = self._generate_refresh_token()
         refresh_token_hash = self.hash_refresh_token(refresh_token)
 
-        # Calculate expiration (in seconds)
-        access_expires_in = self._access_token_expire_minutes * 60
-        refresh_expires_in = self._refresh_token_expire_days * 86400
-
         return access_token, refresh_token, refresh_token_hash, access_expires_in, refresh_expires_in
 
-    def _create_access_token(self, user_id: UUID, username: str, email: str) -> str:
+    def _create_access_token(
+        self,
+        user_id: UUID,
+        username: str,
+        email: str,
+        session_id: Optional[UUID] = None,
+        expires_delta: Optional[timedelta] = None
+    ) -> str:
         """Creates an access token"""
 
-        expires_delta = timedelta(minutes=self._access_token_expire_minutes)
-        expire = datetime.now(timezone.utc) + expires_delta
+        if expires_delta is None:
+            expires_delta = timedelta(minutes=self._access_token_expire_minutes)
+        now = datetime.now(timezone.utc)
+        expire = now + expires_delta
 
         to_encode = {
             "sub": str(user_id),  # Subject
             "username": username,
             "email": email,
             "exp": expire,
-            "iat": datetime.now(timezone.utc), # Issued at
+            "iat": now.timestamp(), # Issued at, à la microseconde pour l'ordonner face à un logout global
+            "jti": uuid4().hex, # Identifiant du token
             "type": "access_token"
         }
+        if session_id is not None:
+            to_encode["sid"] = str(session_id) # Session d'origine, clé de révocation au logout
 
         encoded_jwt = jwt.encode(to_encode, self._secret_key, algorithm=self._algorithm)
         return encoded_jwt
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from passlib.context import CryptContext
 
 from app.domain.ports.services.password_service import IPasswordService
@@ -6,8 +8,11 @@ from app.domain.ports.services.password_service import IPasswordService
 class PasswordService(IPasswordService):
     """Service for password hashing and verification"""
     
-    def __init__(self) -> None:
-        self._pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    def __init__(self, bcrypt_rounds: Optional[int] = None) -> None:
+        """bcrypt_rounds overrides passlib's default cost factor (tests use the minimum, 4)"""
+
+        options = {"bcrypt__rounds": bcrypt_rounds} if bcrypt_rounds is not None else {}
+        self._pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", **options)
     
     def hash_password(self, password: str) -> str:
         """Hashes a password"""
@@ -0,0 +1,55 @@
+import ssl
+from typing import Optional
+
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+
+from app.config import settings
+
+
+def create_redis_client(
+  socket_timeout: float = 10.0,
+  socket_connect_timeout: float = 10.0,
+  retry_on_timeout: bool = True,
+  retry: Optional[Retry] = None
+) -> redis.Redis:
+  """Crée un client Redis depuis la configuration (la connexion est ouverte au premier appel)
+
+  Les timeouts par défaut conviennent aux jobs ; un appel sur le chemin d'une requête HTTP
+  passe des timeouts courts et `retry=no_retry()` pour échouer vite.
+  """
+
+  options = {
+      "decode_responses": False,  # Données de job en msgpack binaire
+      "socket_timeout": socket_timeout,
+      "socket_connect_timeout": socket_connect_timeout,
+      "retry_on_timeout": retry_on_timeout,
+      "health_check_interval": 30
+  }
+  if retry is not None:
+      options["retry"] = retry
+
+  if hasattr(settings, 'redis_host') and settings.redis_host:
+      # Redis configuration (separate for production and testing)
+      redis_config = {
+          "host": settings.redis_host,
+          "port": settings.redis_port,
+          "password": settings.redis_password,
+          **options
+      }
+      if settings.redis_ssl:
+          redis_config.update({
+              "ssl": True,
+              "ssl_cert_reqs": ssl.CERT_NONE,
+              "ssl_check_hostname": False
+          })
+      return redis.Redis(**redis_config)
+
+  # For testing and local development
+  return redis.from_url(settings.redis_url, **options)
+
+
+def no_retry() -> Retry:
+  """Politique sans nouvelle tentative (redis-py réessaie par défaut les erreurs de connexion)"""
+  return Retry(NoBackoff(), 0)
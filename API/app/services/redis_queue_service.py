@@ -1,17 +1,55 @@
 import json
-import ssl
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID
 
+import msgpack
 import redis.asyncio as redis
 
 from app.config import settings
 from app.domain.ports.services.queue_service import IQueueService, ProcessingJob
+from app.services.redis_client import create_redis_client
 
 logger = logging.getLogger(__name__)
 
+# Type d'extension msgpack pour les UUID (16 octets bruts au lieu de 36 caractères)
+UUID_EXT_TYPE = 1
+
+
+def _msgpack_default(obj: Any) -> Any:
+  """Sérialise les types non natifs msgpack"""
+  if isinstance(obj, UUID):
+      return msgpack.ExtType(UUID_EXT_TYPE, obj.bytes)
+  if isinstance(obj, datetime):
+      return obj.isoformat()
+  raise TypeError(f"Unsupported type for msgpack: {type(obj).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+  """Désérialise les types d'extension msgpack"""
+  if code == UUID_EXT_TYPE:
+      return UUID(bytes=data)
+  return msgpack.ExtType(code, data)
+
+
+def pack_job_data(job_data: dict) -> bytes:
+  """Encode les données d'un job en msgpack"""
+  return msgpack.packb(job_data, default=_msgpack_default, use_bin_type=True)
+
+
+def unpack_job_data(raw: bytes) -> dict:
+  """Décode les données d'un job (msgpack, avec repli JSON pour les anciens jobs)"""
+  try:
+      return msgpack.unpackb(raw, raw=False, ext_hook=_msgpack_ext_hook)
+  except ValueError:
+      return json.loads(raw)
+
+
+def _to_str(value: Any) -> Any:
+  """Décode une réponse Redis binaire en str"""
+  return value.decode("utf-8") if isinstance(value, bytes) else value
+
 
 class RedisQueueService(IQueueService):
   """Queue service using Redis"""
@@ -47,36 +85,7 @@ class RedisQueueService(IQueueService):
       
       logger.info(f"Redis: Connecting to {settings.redis_host}:{settings.redis_port}") if settings.debug else None
       
-      if hasattr(settings, 'redis_host') and settings.redis_host:
-          # Redis configuration (separate for production and testing)
-          redis_config = {
-              "host": settings.redis_host,
-              "port": settings.redis_port,
-              "password": settings.redis_password,
-              "decode_responses": True,
-              "socket_timeout": 10.0,
-              "socket_connect_timeout": 10.0,
-              "retry_on_timeout": True,
-              "health_check_interval": 30
-          }
-          if settings.redis_ssl:
-              redis_config.update({
-                  "ssl": True,
-                  "ssl_cert_reqs": ssl.CERT_NONE,
-                  "ssl_check_hostname": False
-              })
-          self._redis = redis.Redis(**redis_config)
-
-      else:
-          # For testing and local development
-          self._redis = redis.from_url(
-              settings.redis_url,
-              decode_responses=True,
-              socket_timeout=10.0,
-              socket_connect_timeout=10.0,
-              retry_on_timeout=True,
-              health_check_interval=30
-          )
+      self._redis = create_redis_client()
       
       # New connection test
       try:
@@ -120,11 +129,11 @@ class RedisQueueService(IQueueService):
           # Serialize job
           job_data = {
               "job_id": job_id,
-              "image_id": str(image_id),
-              "game_id": str(game_id),
+              "image_id": image_id,
+              "game_id": game_id,
               "blob_path": blob_path,
               "filename": filename,
-              "batch_id": str(batch_id) if batch_id else None,
+              "batch_id": batch_id,
               "retry_count": 0,
               "max_retries": settings.queue_retry_attempts,
               "metadata": {},
@@ -138,7 +147,7 @@ class RedisQueueService(IQueueService):
           await redis_client.setex(
               f"{self.JOB_DATA_PREFIX}{job_id}",
               timedelta(hours=settings.redis_ttl),
-              json.dumps(job_data)
+              pack_job_data(job_data)
           )
 
           if settings.debug:
@@ -173,7 +182,7 @@ class RedisQueueService(IQueueService):
 
       redis_client = await self._get_redis()
       status = await redis_client.get(f"{self.STATUS_PREFIX}{job_id}")
-      return status if status else None
+      return _to_str(status) if status else None
 
   async def retry_failed_job(self, job_id: str) -> bool:
       """Puts back a failed job in queue"""
@@ -185,7 +194,7 @@ class RedisQueueService(IQueueService):
       if not job_data:
           return False
 
-      job_info = json.loads(job_data)
+      job_info = unpack_job_data(job_data)
 
       # Check if it can be tried again
       if job_info["retry_count"] >= job_info["max_retries"]:
@@ -199,7 +208,7 @@ class RedisQueueService(IQueueService):
       await redis_client.setex(
           f"{self.JOB_DATA_PREFIX}{job_id}",
           timedelta(hours=settings.redis_ttl),
-          json.dumps(job_info)
+          pack_job_data(job_info)
       )
 
       # Put back in queue
@@ -254,6 +263,7 @@ class RedisQueueService(IQueueService):
               return None
 
           _, job_id = result # Get job_id
+          job_id = _to_str(job_id)
 
           if settings.debug:
               logging.info(f"[REDIS_DEBUG] Dequeued job ID: {job_id}")
@@ -269,10 +279,10 @@ class RedisQueueService(IQueueService):
               logging.info(f"[REDIS_DEBUG] Job data retrieved successfully for {job_id}")
 
           try:
-              job_info = json.loads(job_data)
-          except json.JSONDecodeError as e:
+              job_info = unpack_job_data(job_data)
+          except ValueError as e:
               if settings.debug:
-                  logging.error(f"[REDIS_DEBUG] ERREUR JSON decode pour {job_id}: {str(e)}")
+                  logging.error(f"[REDIS_DEBUG] ERREUR decode pour {job_id}: {str(e)}")
                   logging.error(f"[REDIS_DEBUG] Raw job data: {job_data}")
               return None
 
@@ -287,11 +297,11 @@ class RedisQueueService(IQueueService):
 
           return ProcessingJob(
               job_id=job_info["job_id"],
-              image_id=UUID(job_info["image_id"]),
-              game_id=UUID(job_info["game_id"]),
+              image_id=UUID(str(job_info["image_id"])),
+              game_id=UUID(str(job_info["game_id"])),
               blob_path=job_info["blob_path"],
               filename=job_info["filename"],
-              batch_id=UUID(job_info["batch_id"]) if job_info.get("batch_id") else None,
+              batch_id=UUID(str(job_info["batch_id"])) if job_info.get("batch_id") else None,
               retry_count=job_info["retry_count"],
               max_retries=job_info["max_retries"],
               metadata=job_info["metadata"]
@@ -0,0 +1,59 @@
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.config import settings
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
+from app.services.redis_client import create_redis_client, no_retry
+
+logger = logging.getLogger(__name__)
+
+
+class RedisTokenBlacklistService(ITokenBlacklistService):
+  """Liste de révocation des access tokens dans Redis.
+
+  Une session désactivée est stockée par son ID (claim "sid" des access tokens), avec un TTL
+  égal à la durée de vie d'un access token : les clés disparaissent d'elles-mêmes quand les
+  tokens de la session auraient expiré de toute façon. Un logout global pose une date de
+  coupure par utilisateur, valable aussi une durée de vie d'access token.
+  """
+
+  SESSION_KEY_PREFIX = "bl:s:"
+  USER_KEY_PREFIX = "bl:u:"
+
+  def __init__(self):
+      self._redis: Optional[redis.Redis] = None
+
+  def _get_redis(self) -> redis.Redis:
+      """Client créé à la demande ; timeouts courts et sans nouvelle tentative, l'appelant se rabat sur la base"""
+      if self._redis is None:
+          timeout = settings.token_blacklist_timeout_seconds
+          self._redis = create_redis_client(
+              socket_timeout=timeout,
+              socket_connect_timeout=timeout,
+              retry_on_timeout=False,
+              retry=no_retry()
+          )
+      return self._redis
+
+  async def revoke_session(self, session_id: str, expires_in: int) -> None:
+      """Révoque les access tokens d'une session"""
+      await self._get_redis().set(f"{self.SESSION_KEY_PREFIX}{session_id}", b"1", ex=expires_in)
+
+  async def revoke_all_for_user(self, user_id: str, issued_before: float, expires_in: int) -> None:
+      """Révoque les access tokens de l'utilisateur émis avant `issued_before`"""
+      await self._get_redis().set(f"{self.USER_KEY_PREFIX}{user_id}", repr(issued_before).encode(), ex=expires_in)
+
+  async def is_revoked(self, session_id: str, user_id: str, issued_at: float) -> bool:
+      """Indique si un access token a été révoqué ; un seul aller-retour Redis pour les deux clés"""
+      session_flag, cutoff = await self._get_redis().mget(
+          f"{self.SESSION_KEY_PREFIX}{session_id}", f"{self.USER_KEY_PREFIX}{user_id}"
+      )
+      return session_flag is not None or (cutoff is not None and issued_at < float(cutoff))
+
+  async def close(self) -> None:
+      """Ferme la connexion Redis"""
+      if self._redis is not None:
+          await self._redis.aclose()
+          self._redis = None
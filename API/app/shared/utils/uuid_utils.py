@@ -0,0 +1,11 @@
+import os
+from uuid import UUID
+
+
+def uuid4_batch(n: int) -> list[UUID]:
+    """Générer n UUID v4 à partir d'un seul appel à os.urandom"""
+    if n <= 0:
+        return []
+    buf = os.urandom(16 * n)
+    # UUID(version=4) applique les bits de version et de variante RFC 4122
+    return [UUID(bytes=buf[i * 16:(i + 1) * 16], version=4) for i in range(n)]
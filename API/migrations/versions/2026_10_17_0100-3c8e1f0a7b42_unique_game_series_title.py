@@ -0,0 +1,36 @@
+"""unique game series title
+
+Revision ID: 3c8e1f0a7b42
+Revises: 91859bf23f8f
+Create Date: 2026-10-17 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e1f0a7b42'
+down_revision = '91859bf23f8f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Des doublons existants feraient échouer la contrainte : on les signale plutôt que de choisir
+    # à la place de l'exploitant quelle série garder (les jeux y sont rattachés par series_id)
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT title, COUNT(*) FROM game_series GROUP BY title HAVING COUNT(*) > 1 ORDER BY title"
+    )).all()
+    if duplicates:
+        listing = ", ".join(f"'{title}' ({count})" for title, count in duplicates)
+        raise RuntimeError(
+            f"Cannot add uq_game_series_title: duplicate game_series titles found: {listing}. "
+            "Rename or merge these series (and move their games' series_id) before upgrading."
+        )
+
+    op.create_unique_constraint('uq_game_series_title', 'game_series', ['title'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_game_series_title', 'game_series', type_='unique')
@@ -10,7 +10,7 @@ from sqlalchemy import event, DateTime as SQLDateTime, TypeDecorator, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.dependencies import get_db_session
-from app.dependencies.services import get_blob_storage_service, get_ai_processing_service, get_queue_service
+from app.dependencies.services import get_blob_storage_service, get_ai_processing_service, get_queue_service, get_token_blacklist_service
 from app.main import app
 from app.data.connection import Base
 
@@ -63,6 +63,49 @@ class MockRedisQueueService:
     async def get_job_status(self, job_id: str) -> dict:
         return self.jobs.get(job_id, {"status": "not_found"})
 
+class MockTokenBlacklistService:
+    """Mock de la liste de révocation Redis pour les tests (available=False simule Redis injoignable)"""
+    def __init__(self):
+        self.revoked = {}
+        self.user_cutoffs = {}
+        self.available = True
+
+    def _check_available(self) -> None:
+        if not self.available:
+            raise ConnectionError("Mock Redis unavailable")
+
+    async def revoke_session(self, session_id: str, expires_in: int) -> None:
+        self._check_available()
+        self.revoked[session_id] = expires_in
+
+    async def revoke_all_for_user(self, user_id: str, issued_before: float, expires_in: int) -> None:
+        self._check_available()
+        self.user_cutoffs[user_id] = issued_before
+
+    async def is_revoked(self, session_id: str, user_id: str, issued_at: float) -> bool:
+        self._check_available()
+        cutoff = self.user_cutoffs.get(user_id)
+        return session_id in self.revoked or (cutoff is not None and issued_at < cutoff)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-remote",
+        action="store_true",
+        default=False,
+        help="Lance les tests marqués remote contre les vrais services Azure/Redis"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Les tests remote sont ignorés sans --run-remote ; leurs variantes locales tournent toujours"""
+    if config.getoption("--run-remote"):
+        return
+    skip_remote = pytest.mark.skip(reason="test distant : utiliser --run-remote")
+    for item in items:
+        if "remote" in item.keywords:
+            item.add_marker(skip_remote)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -117,6 +160,7 @@ async def mock_azure_services():
     mock_blob_service = MockAzureBlobStorageService()
     mock_ai_service = MockOpenAIProcessingService()
     mock_queue_service = MockRedisQueueService()
+    mock_blacklist_service = MockTokenBlacklistService()
     
     # Fonctions de factory qui retournent directement les instances (évite les AsyncMock)
     def get_mock_blob_service():
@@ -127,16 +171,21 @@ async def mock_azure_services():
         
     def get_mock_queue_service():
         return mock_queue_service
+
+    def get_mock_blacklist_service():
+        return mock_blacklist_service
     
     # Override les dépendances avec des fonctions normales
     app.dependency_overrides[get_blob_storage_service] = get_mock_blob_service
     app.dependency_overrides[get_ai_processing_service] = get_mock_ai_service
     app.dependency_overrides[get_queue_service] = get_mock_queue_service
+    app.dependency_overrides[get_token_blacklist_service] = get_mock_blacklist_service
     
     yield {
         "blob_service": mock_blob_service,
         "ai_service": mock_ai_service,
-        "queue_service": mock_queue_service
+        "queue_service": mock_queue_service,
+        "blacklist_service": mock_blacklist_service
     }
     
     # Cleanup après les tests
@@ -146,6 +195,8 @@ async def mock_azure_services():
         del app.dependency_overrides[get_ai_processing_service]
     if get_queue_service in app.dependency_overrides:
         del app.dependency_overrides[get_queue_service]
+    if get_token_blacklist_service in app.dependency_overrides:
+        del app.dependency_overrides[get_token_blacklist_service]
 
 
 @pytest_asyncio.fixture
@@ -0,0 +1,154 @@
+import inspect
+import itertools
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.config import settings
+from app.domain.entities.user import User
+from app.domain.entities.user_session import UserSession
+from app.domain.ports.repositories.user_repository import IUserRepository
+from app.domain.ports.repositories.user_session_repository import IUserSessionRepository
+from app.domain.ports.services.jwt_service import IJWTService
+from app.domain.ports.services.password_service import IPasswordService
+from app.domain.ports.services.token_blacklist_service import ITokenBlacklistService
+
+# Durées de validité des tokens en secondes, résolues une seule fois pour tout le package
+ACCESS_EXP_S = settings.jwt_access_token_expire_minutes * 60
+REFRESH_EXP_S = settings.jwt_refresh_token_expire_days * 86400
+
+# UUID tirés une fois par session : identifiants stables d'un test à l'autre, plus simples à suivre en debug
+UUID_POOL = tuple(uuid4() for _ in range(16))
+
+# Ports des dépendances mockées : avec le spec, les méthodes synchrones des ports restent synchrones
+_DEP_SPECS = {
+    "user_repository": IUserRepository,
+    "session_repository": IUserSessionRepository,
+    "password_service": IPasswordService,
+    "jwt_service": IJWTService
+}
+
+_AUTH_TESTS_DIR = Path(__file__).parent
+
+
+@dataclass
+class FastAsyncStub:
+    """Stub async léger pour les dépendances dont on ne vérifie pas les appels.
+
+    Évite la machinerie d'AsyncMock (introspection, suivi des awaits) ;
+    garder AsyncMock pour les méthodes sur lesquelles on fait des assertions.
+    """
+    returns: Any = None
+    side_effect: Optional[BaseException] = None
+    calls: list = field(default_factory=list)
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        self.calls.append((args, kwargs))
+        if self.side_effect is not None:
+            raise self.side_effect
+        if inspect.isawaitable(self.returns):
+            return await self.returns
+        return self.returns
+
+
+def pytest_pycollect_makeitem(collector, name, obj) -> None:
+    """Partage une seule boucle d'événements entre les tests async du package.
+
+    asyncio_mode = auto dispense du marqueur par test ; on ne marque que les
+    coroutines (pytest-asyncio avertit sur les tests synchrones marqués) et
+    avant la collecte, la portée de boucle étant résolue à la paramétrisation.
+    """
+    if collector.path.is_relative_to(_AUTH_TESTS_DIR) and inspect.iscoroutinefunction(obj):
+        pytest.mark.asyncio(loop_scope="session")(obj)
+
+
+@pytest.fixture(scope="session")
+def now_utc() -> datetime:
+    """Horodatage figé pour la session : les tests n'ont pas besoin d'une horloge fraîche"""
+    return datetime.now(timezone.utc)
+
+
+@pytest.fixture(scope="package", autouse=True)
+def freeze_time_utc(now_utc) -> Iterator[None]:
+    """Fige datetime.now() des entités auth sur now_utc le temps du package.
+
+    AUTH_TESTS_REAL_CLOCK=1 désactive le gel pour les tests qui ont besoin de l'horloge réelle.
+    """
+    if os.getenv("AUTH_TESTS_REAL_CLOCK") == "1":
+        yield
+        return
+
+    class _FrozenDateTime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now_utc if tz is None else now_utc.astimezone(tz)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.domain.entities.user.datetime", _FrozenDateTime)
+        mp.setattr("app.domain.entities.user_session.datetime", _FrozenDateTime)
+        yield
+
+
+@pytest.fixture(scope="session")
+def uuid_pool() -> Iterator[UUID]:
+    """Itérateur infini sur UUID_POOL"""
+    return itertools.cycle(UUID_POOL)
+
+
+@pytest.fixture(scope="session")
+def jwt_token_pair() -> tuple:
+    """Paire de tokens renvoyée par le JWT service mocké"""
+    return "access_token", "refresh_token", "refresh_hash", ACCESS_EXP_S, REFRESH_EXP_S
+
+
+def _build_user() -> User:
+    return User.create(
+        username="testuser",
+        email="test@example.com",
+        first_name="Test",
+        last_name="User",
+        hashed_password="hashed_password_123"
+    )
+
+
+@pytest.fixture
+def test_user() -> User:
+    """User neuf par test : les mutations ne fuient pas vers les autres tests"""
+    return _build_user()
+
+
+@pytest.fixture
+def inactive_user() -> User:
+    """Variante désactivée de test_user"""
+    user = _build_user()
+    user.is_active = False
+    return user
+
+
+@pytest.fixture
+def test_session(test_user, now_utc) -> UserSession:
+    """UserSession neuve de test_user par test : certains tests modifient user_id"""
+    return UserSession.create(
+        user_id=test_user.id,
+        refresh_token_hash="test_hash",
+        expires_at=now_utc + timedelta(days=15),
+        device_info={"platform": "web"}
+    )
+
+
+@pytest.fixture
+def mock_dependencies() -> dict:
+    """Mocks neufs par test : appels, valeurs de retour et attributs remplacés restent propres au test"""
+    return {name: AsyncMock(spec=spec) for name, spec in _DEP_SPECS.items()}
+
+
+@pytest.fixture
+def token_blacklist() -> AsyncMock:
+    """Liste de révocation mockée, pour les use cases qui désactivent des sessions"""
+    return AsyncMock(spec=ITokenBlacklistService)
@@ -1,6 +1,6 @@
-from unittest.mock import AsyncMock, Mock
+import re
+from unittest.mock import Mock
 
-from app.config import settings
 import pytest
 
 from app.domain.use_cases.auth.authenticate_user import (
@@ -11,21 +11,23 @@ from app.domain.use_cases.auth.authenticate_user import (
   UserNotActiveError
 )
 from app.domain.entities.user import User
-from datetime import datetime, timezone
+from tests.domain.use_cases.auth.conftest import ACCESS_EXP_S, REFRESH_EXP_S, FastAsyncStub
+
+# Motifs des messages d'erreur attendus, compilés une seule fois
+_RE_INVALID_CREDENTIALS = re.compile("Invalid username/email or password")
+_RE_INACTIVE = re.compile("User account is deactivated")
+_RE_EMPTY_USER = re.compile("Username or email is required")
+_RE_EMPTY_PW = re.compile("Password is required")
+_RE_MULTI = re.compile("Username or email is required.*Password is required")
+
+# Utilisateurs concurrents pour _find_user : un username qui ressemble à l'email de l'autre
+_EMAIL_USER = User.create("emailuser", "test@example.com", "Email", "User", "hash1")
+_USERNAME_USER = User.create("test@example.com", "other@example.com", "Username", "User", "hash2")
 
 
 class TestAuthenticateUser:
   """Tests pour le use case AuthenticateUser"""
 
-  @pytest.fixture
-  def mock_dependencies(self):
-      return {
-          "user_repository": AsyncMock(),
-          "session_repository": AsyncMock(),
-          "password_service": AsyncMock(),
-          "jwt_service": AsyncMock()
-      }
-
   @pytest.fixture
   def use_case(self, mock_dependencies):
       return AuthenticateUser(**mock_dependencies)
@@ -40,17 +42,7 @@ class TestAuthenticateUser:
           jwt_service=Mock()
       )
 
-  @pytest.fixture
-  def test_user(self):
-      return User.create(
-          username="testuser",
-          email="test@example.com",
-          first_name="Test",
-          last_name="User",
-          hashed_password="hashed_password_123"
-      )
-
-  @pytest.fixture
+  @pytest.fixture(scope="session")
   def valid_request_email(self):
       return AuthenticateUserRequest(
           username_or_email="test@example.com",
@@ -59,27 +51,26 @@ class TestAuthenticateUser:
       )
 
   @pytest.fixture
-  def valid_request_username(self):
-      return AuthenticateUserRequest(
-          username_or_email="testuser",
-          password="password123"
-      )
-
-  @pytest.mark.asyncio
-  async def test_successful_authentication_with_email(self, use_case, mock_dependencies, valid_request_email, test_user) -> None:
-      """Test authentification réussie avec email"""
-      # Setup mocks
+  def happy_path_mocks(self, mock_dependencies, test_user, jwt_token_pair, now_utc):
+      """Installe les mocks d'une authentification réussie"""
       mock_dependencies["user_repository"].find_by_email.return_value = test_user
-      mock_dependencies["password_service"].verify_password = Mock(return_value=True)
-      mock_dependencies["jwt_service"].create_token_pair = Mock(return_value=(
-          "access_token", "refresh_token", "refresh_hash",
-          settings.jwt_access_token_expire_minutes * 60,
-          settings.jwt_refresh_token_expire_days * 24 * 60 * 60
-      ))
-      mock_dependencies["jwt_service"].get_refresh_token_expiry = Mock(return_value=datetime.now(timezone.utc))
+      mock_dependencies["password_service"].verify_password.return_value = True
+      mock_dependencies["jwt_service"].create_token_pair.return_value = jwt_token_pair
+      mock_dependencies["jwt_service"].get_refresh_token_expiry.return_value = now_utc
+      mock_dependencies["session_repository"].cleanup_expired_sessions = FastAsyncStub()
+      return mock_dependencies
+
+  @pytest.mark.parametrize("username_or_email, repo_method", [
+      ("test@example.com", "find_by_email"),
+      ("testuser", "find_by_username"),
+  ])
+  async def test_successful_authentication(self, use_case, happy_path_mocks, test_user, username_or_email, repo_method) -> None:
+      """Test authentification réussie avec email ou username"""
+      getattr(happy_path_mocks["user_repository"], repo_method).return_value = test_user
+      request = AuthenticateUserRequest(username_or_email=username_or_email, password="password123")
 
       # Execute
-      result = await use_case.execute(valid_request_email)
+      result = await use_case.execute(request)
 
       # Assert
       assert isinstance(result, AuthenticateUserResponse)
@@ -89,65 +80,40 @@ class TestAuthenticateUser:
       assert result.user_id == str(test_user.id)
       assert result.username == test_user.username
       assert result.email == test_user.email
-      assert result.expires_in == settings.jwt_access_token_expire_minutes * 60
-      assert result.refresh_expires_in == settings.jwt_refresh_token_expire_days * 24 * 60 * 60
+      assert result.expires_in == ACCESS_EXP_S
+      assert result.refresh_expires_in == REFRESH_EXP_S
+      getattr(happy_path_mocks["user_repository"], repo_method).assert_called_once_with(username_or_email)
 
       # Verify session was saved
-      mock_dependencies["session_repository"].save.assert_called_once()
-
-  @pytest.mark.asyncio
-  async def test_successful_authentication_with_username(self, use_case, mock_dependencies, valid_request_username, test_user) -> None:
-      """Test authentification réussie avec username"""
-      # Setup mocks
-      mock_dependencies["user_repository"].find_by_email.return_value = None
-      mock_dependencies["user_repository"].find_by_username.return_value = test_user
-      mock_dependencies["password_service"].verify_password = Mock(return_value=True)
-      mock_dependencies["jwt_service"].create_token_pair = Mock(return_value=(
-          "access_token", "refresh_token", "refresh_hash",
-          settings.jwt_access_token_expire_minutes * 60,
-          settings.jwt_refresh_token_expire_days * 24 * 60 * 60
-      ))
-      mock_dependencies["jwt_service"].get_refresh_token_expiry = Mock(return_value=datetime.now(timezone.utc))
-
-      # Execute
-      result = await use_case.execute(valid_request_username)
+      happy_path_mocks["session_repository"].save.assert_called_once()
 
-      # Assert
-      assert result.access_token == "access_token"
-      mock_dependencies["user_repository"].find_by_username.assert_called_once_with("testuser")
-
-  @pytest.mark.asyncio
   async def test_authentication_user_not_found(self, use_case, mock_dependencies, valid_request_email) -> None:
       """Test authentification avec utilisateur non trouvé"""
       # Setup mocks
       mock_dependencies["user_repository"].find_by_email.return_value = None
       mock_dependencies["user_repository"].find_by_username.return_value = None
-      mock_dependencies["password_service"].verify_password = Mock()
 
       # Execute & Assert
-      with pytest.raises(InvalidCredentialsError, match="Invalid username/email or password"):
+      with pytest.raises(InvalidCredentialsError, match=_RE_INVALID_CREDENTIALS):
           await use_case.execute(valid_request_email)
 
-  @pytest.mark.asyncio
-  async def test_authentication_user_inactive(self, use_case, mock_dependencies, valid_request_email, test_user) -> None:
+  async def test_authentication_user_inactive(self, use_case, mock_dependencies, valid_request_email, inactive_user) -> None:
       """Test authentification avec utilisateur inactif"""
       # Setup inactive user
-      test_user.is_active = False
-      mock_dependencies["user_repository"].find_by_email.return_value = test_user
+      mock_dependencies["user_repository"].find_by_email.return_value = inactive_user
 
       # Execute & Assert
-      with pytest.raises(UserNotActiveError, match="User account is deactivated"):
+      with pytest.raises(UserNotActiveError, match=_RE_INACTIVE):
           await use_case.execute(valid_request_email)
 
-  @pytest.mark.asyncio
   async def test_authentication_invalid_password(self, use_case, mock_dependencies, valid_request_email, test_user) -> None:
       """Test authentification avec mot de passe invalide"""
       # Setup mocks
       mock_dependencies["user_repository"].find_by_email.return_value = test_user
-      mock_dependencies["password_service"].verify_password = Mock(return_value=False)
+      mock_dependencies["password_service"].verify_password.return_value = False
 
       # Execute & Assert
-      with pytest.raises(InvalidCredentialsError, match="Invalid username/email or password"):
+      with pytest.raises(InvalidCredentialsError, match=_RE_INVALID_CREDENTIALS):
           await use_case.execute(valid_request_email)
 
       # Verify password was checked
@@ -155,8 +121,7 @@ class TestAuthenticateUser:
           "password123", test_user.hashed_password
       )
 
-  @pytest.mark.asyncio
-  async def test_authentication_with_device_info(self, use_case, mock_dependencies, test_user) -> None:
+  async def test_authentication_with_device_info(self, use_case, happy_path_mocks, test_user) -> None:
       """Test authentification avec device_info"""
       device_info = {"platform": "mobile", "version": "1.0.0"}
       request = AuthenticateUserRequest(
@@ -165,42 +130,32 @@ class TestAuthenticateUser:
           device_info=device_info
       )
 
-      # Setup mocks
-      mock_dependencies["user_repository"].find_by_email.return_value = test_user
-      mock_dependencies["password_service"].verify_password = Mock(return_value=True)
-      mock_dependencies["jwt_service"].create_token_pair = Mock(return_value=(
-          "access_token", "refresh_token", "refresh_hash",
-          settings.jwt_access_token_expire_minutes * 60,
-          settings.jwt_refresh_token_expire_days * 24 * 60 * 60
-      ))
-      mock_dependencies["jwt_service"].get_refresh_token_expiry = Mock(return_value=datetime.now(timezone.utc))
-
       # Execute
       await use_case.execute(request)
 
-      # Verify session was created with device_info
-      save_call = mock_dependencies["session_repository"].save.call_args[0][0]
-      assert save_call.device_info == device_info
-
-  @pytest.mark.asyncio
-  async def test_session_cleanup_failure_does_not_break_auth(self, use_case, mock_dependencies, valid_request_email, test_user) -> None:
+      # Verify session was created with device_info (un seul relevé de call_args)
+      save_call_args = happy_path_mocks["session_repository"].save.call_args
+      saved_session = save_call_args.args[0]
+      assert saved_session.device_info == device_info
+      assert saved_session.user_id == test_user.id
+      assert saved_session.refresh_token_hash == "refresh_hash"
+      # L'access token porte l'ID de la session enregistrée
+      token_kwargs = happy_path_mocks["jwt_service"].create_token_pair.call_args.kwargs
+      assert token_kwargs["session_id"] == saved_session.id
+      assert token_kwargs["session_expires_at"] == saved_session.expires_at
+      assert save_call_args.kwargs == {}
+
+  async def test_session_cleanup_failure_does_not_break_auth(self, use_case, happy_path_mocks, valid_request_email) -> None:
       """Test que l'échec du nettoyage des sessions n'interrompt pas l'auth"""
       # Setup mocks
-      mock_dependencies["user_repository"].find_by_email.return_value = test_user
-      mock_dependencies["password_service"].verify_password = Mock(return_value=True)
-      mock_dependencies["jwt_service"].create_token_pair = Mock(return_value=(
-          "access_token", "refresh_token", "refresh_hash",
-          settings.jwt_access_token_expire_minutes * 60,
-          settings.jwt_refresh_token_expire_days * 24 * 60 * 60
-      ))
-      mock_dependencies["jwt_service"].get_refresh_token_expiry = Mock(return_value=datetime.now(timezone.utc))
-      mock_dependencies["session_repository"].cleanup_expired_sessions.side_effect = Exception("Cleanup failed")
+      happy_path_mocks["session_repository"].cleanup_expired_sessions.side_effect = Exception("Cleanup failed")
 
       # Execute - should not raise exception
       result = await use_case.execute(valid_request_email)
 
       # Assert - auth still succeeds
       assert result.access_token == "access_token"
+      assert len(happy_path_mocks["session_repository"].cleanup_expired_sessions.calls) == 1
 
   def test_validation_empty_username_or_email(self, use_case_for_validation) -> None:
       """Test validation avec username/email vide"""
@@ -209,7 +164,7 @@ class TestAuthenticateUser:
           password="password123",
       )
 
-      with pytest.raises(ValueError, match="Username or email is required"):
+      with pytest.raises(ValueError, match=_RE_EMPTY_USER):
           use_case_for_validation._validate_request(request)
 
   def test_validation_empty_password(self, use_case_for_validation) -> None:
@@ -219,7 +174,7 @@ class TestAuthenticateUser:
           password=""
       )
 
-      with pytest.raises(ValueError, match="Password is required"):
+      with pytest.raises(ValueError, match=_RE_EMPTY_PW):
           use_case_for_validation._validate_request(request)
 
   def test_validation_multiple_errors(self, use_case_for_validation) -> None:
@@ -229,33 +184,23 @@ class TestAuthenticateUser:
           password=""
       )
 
-      with pytest.raises(ValueError, match="Username or email is required.*Password is required"):
+      with pytest.raises(ValueError, match=_RE_MULTI):
           use_case_for_validation._validate_request(request)
 
-  @pytest.mark.asyncio
-  async def test_find_user_prefers_email_over_username(self, use_case, mock_dependencies) -> None:
-      """Test que find_user privilégie l'email quand @ est présent"""
-      email_user = User.create("emailuser", "test@example.com", "Email", "User", "hash1")
-      username_user = User.create("test@example.com", "other@example.com", "Username", "User", "hash2")
-
-      mock_dependencies["user_repository"].find_by_email.return_value = email_user
-      mock_dependencies["user_repository"].find_by_username.return_value = username_user
+  @pytest.mark.parametrize("email_hit, expected_key", [
+      (True, "email"),
+      (False, "username"),
+  ], ids=["prefers_email", "falls_back_to_username"])
+  async def test_find_user_with_at_sign(self, use_case, mock_dependencies, email_hit, expected_key) -> None:
+      """Test que find_user privilégie l'email quand @ est présent, puis se rabat sur le username"""
+      mock_dependencies["user_repository"].find_by_email.return_value = _EMAIL_USER if email_hit else None
+      mock_dependencies["user_repository"].find_by_username.return_value = _USERNAME_USER
 
       result = await use_case._find_user("test@example.com")
 
-      # Should return email user, not username user
-      assert result == email_user
+      assert result == (_EMAIL_USER if expected_key == "email" else _USERNAME_USER)
       mock_dependencies["user_repository"].find_by_email.assert_called_once_with("test@example.com")
-
-  @pytest.mark.asyncio
-  async def test_find_user_falls_back_to_username(self, use_case, mock_dependencies) -> None:
-      """Test fallback vers username si email échoue"""
-      username_user = User.create("test@example.com", "other@example.com", "Username", "User", "hash")
-
-      mock_dependencies["user_repository"].find_by_email.return_value = None
-      mock_dependencies["user_repository"].find_by_username.return_value = username_user
-
-      result = await use_case._find_user("test@example.com")
-
-      assert result == username_user
-      mock_dependencies["user_repository"].find_by_username.assert_called_once_with("test@example.com")
\ No newline at end of file
+      if email_hit:
+          mock_dependencies["user_repository"].find_by_username.assert_not_called()
+      else:
+          mock_dependencies["user_repository"].find_by_username.assert_called_once_with("test@example.com")
@@ -1,5 +1,4 @@
-from unittest.mock import AsyncMock, Mock
-from uuid import uuid4
+import re
 import pytest
 
 from app.domain.use_cases.auth.logout_user import (
@@ -7,39 +6,29 @@ from app.domain.use_cases.auth.logout_user import (
   LogoutUserRequest,
   LogoutUserResponse
 )
-from app.domain.entities.user_session import UserSession
-from datetime import datetime, timezone
+from tests.domain.use_cases.auth.conftest import ACCESS_EXP_S, UUID_POOL
+
+# Motif du message d'erreur attendu, compilé une seule fois
+_RE_NO_METHOD = re.compile("Must specify either logout_all=True, session_id, or refresh_token")
 
 
 class TestLogoutUser:
   """Tests pour le use case LogoutUser"""
 
   @pytest.fixture
-  def mock_dependencies(self) -> dict:
-      return {
-          "session_repository": AsyncMock(),
-          "jwt_service": AsyncMock()
-      }
-
-  @pytest.fixture
-  def use_case(self, mock_dependencies):
-      return LogoutUser(**mock_dependencies)
-
-  @pytest.fixture
-  def current_user_id(self):
-      return uuid4()
+  def use_case(self, mock_dependencies, token_blacklist):
+      return LogoutUser(
+          session_repository=mock_dependencies["session_repository"],
+          jwt_service=mock_dependencies["jwt_service"],
+          token_blacklist=token_blacklist
+      )
 
   @pytest.fixture
-  def test_session(self, current_user_id):
-      return UserSession.create(
-          user_id=current_user_id,
-          refresh_token_hash="test_hash",
-          expires_at=datetime.now(timezone.utc),
-          device_info={"platform": "web"}
-      )
+  def current_user_id(self, test_user):
+      """Propriétaire de test_session"""
+      return test_user.id
 
-  @pytest.mark.asyncio
-  async def test_logout_all_sessions_successful(self, use_case, mock_dependencies, current_user_id) -> None:
+  async def test_logout_all_sessions_successful(self, use_case, mock_dependencies, token_blacklist, current_user_id) -> None:
       """Test déconnexion de toutes les sessions"""
       request = LogoutUserRequest(logout_all=True)
       mock_dependencies["session_repository"].deactivate_all_user_sessions.return_value = 3
@@ -53,8 +42,9 @@ class TestLogoutUser:
       assert result.sessions_revoked == 3
       assert "Successfully logged out from 3 sessions" in result.message
       mock_dependencies["session_repository"].deactivate_all_user_sessions.assert_called_once_with(current_user_id)
+      token_blacklist.revoke_all_for_user.assert_called_once()
+      assert token_blacklist.revoke_all_for_user.call_args.args[0] == str(current_user_id)
 
-  @pytest.mark.asyncio
   async def test_logout_all_sessions_no_sessions(self, use_case, mock_dependencies, current_user_id) -> None:
       """Test déconnexion de toutes les sessions quand aucune session active"""
       request = LogoutUserRequest(logout_all=True)
@@ -68,165 +58,99 @@ class TestLogoutUser:
       assert result.sessions_revoked == 0
       assert "Successfully logged out from 0 sessions" in result.message
 
-  @pytest.mark.asyncio
-  async def test_logout_by_session_id_successful(self, use_case, mock_dependencies, current_user_id, test_session) -> None:
-      """Test déconnexion par session ID réussie"""
+  @pytest.mark.parametrize("session_owner, deactivate_return, expected", [
+      ("current", True, (True, 1, "Successfully logged out")),
+      (None, None, (False, 0, "Session not found or access denied")),
+      ("other", None, (False, 0, "Session not found or access denied")),
+      ("current", False, (False, 0, "Failed to logout")),
+  ], ids=["successful", "not_found", "wrong_user", "deactivation_failed"])
+  async def test_logout_by_session_id(self, use_case, mock_dependencies, token_blacklist, current_user_id, test_session,
+                                      session_owner, deactivate_return, expected) -> None:
+      """Test déconnexion par session ID"""
+      if session_owner == "other":
+          test_session.user_id = UUID_POOL[1]  # Session d'un autre utilisateur
       request = LogoutUserRequest(session_id=test_session.id)
-      mock_dependencies["session_repository"].find_by_id.return_value = test_session
-      mock_dependencies["session_repository"].deactivate_session.return_value = True
+      mock_dependencies["session_repository"].find_by_id.return_value = test_session if session_owner else None
+      mock_dependencies["session_repository"].deactivate_session.return_value = deactivate_return
 
       # Execute
       result = await use_case.execute(request, current_user_id)
 
       # Assert
-      assert result.success is True
-      assert result.sessions_revoked == 1
-      assert result.message == "Successfully logged out"
+      assert (result.success, result.sessions_revoked, result.message) == expected
       mock_dependencies["session_repository"].find_by_id.assert_called_once_with(test_session.id)
-      mock_dependencies["session_repository"].deactivate_session.assert_called_once_with(test_session.id)
-
-  @pytest.mark.asyncio
-  async def test_logout_by_session_id_not_found(self, use_case, mock_dependencies, current_user_id) -> None:
-      """Test déconnexion par session ID non trouvée"""
-      session_id = uuid4()
-      request = LogoutUserRequest(session_id=session_id)
-      mock_dependencies["session_repository"].find_by_id.return_value = None
-
-      # Execute
-      result = await use_case.execute(request, current_user_id)
-
-      # Assert
-      assert result.success is False
-      assert result.sessions_revoked == 0
-      assert result.message == "Session not found or access denied"
-
-  @pytest.mark.asyncio
-  async def test_logout_by_session_id_wrong_user(self, use_case, mock_dependencies, current_user_id, test_session) -> None:
-      """Test déconnexion par session ID appartenant à un autre utilisateur"""
-      other_user_id = uuid4()
-      test_session.user_id = other_user_id  # Session d'un autre utilisateur
-      request = LogoutUserRequest(session_id=test_session.id)
-      mock_dependencies["session_repository"].find_by_id.return_value = test_session
-
-      # Execute
-      result = await use_case.execute(request, current_user_id)
-
-      # Assert
-      assert result.success is False
-      assert result.sessions_revoked == 0
-      assert result.message == "Session not found or access denied"
-      # Should not try to deactivate
-      mock_dependencies["session_repository"].deactivate_session.assert_not_called()
-
-  @pytest.mark.asyncio
-  async def test_logout_by_session_id_deactivation_failed(self, use_case, mock_dependencies, current_user_id, test_session) -> None:
-      """Test déconnexion par session ID avec échec de désactivation"""
-      request = LogoutUserRequest(session_id=test_session.id)
-      mock_dependencies["session_repository"].find_by_id.return_value = test_session
-      mock_dependencies["session_repository"].deactivate_session.return_value = False
-
-      # Execute
-      result = await use_case.execute(request, current_user_id)
-
-      # Assert
-      assert result.success is False
-      assert result.sessions_revoked == 0
-      assert result.message == "Failed to logout"
-
-  @pytest.mark.asyncio
-  async def test_logout_by_refresh_token_successful(self, use_case, mock_dependencies, current_user_id, test_session) -> None:
-      """Test déconnexion par refresh token réussie"""
+      if deactivate_return is None:
+          # Should not try to deactivate
+          mock_dependencies["session_repository"].deactivate_session.assert_not_called()
+      else:
+          mock_dependencies["session_repository"].deactivate_session.assert_called_once_with(test_session.id)
+      # Les access tokens de la session visée sont révoqués, seulement si elle a été désactivée
+      if deactivate_return:
+          token_blacklist.revoke_session.assert_called_once_with(str(test_session.id), ACCESS_EXP_S)
+      else:
+          token_blacklist.revoke_session.assert_not_called()
+
+  @pytest.mark.parametrize("session_owner, deactivate_return, expected", [
+      ("current", True, (True, 1, "Successfully logged out")),
+      (None, None, (False, 0, "Invalid refresh token or access denied")),
+      ("other", None, (False, 0, "Invalid refresh token or access denied")),
+      ("current", False, (False, 0, "Failed to logout")),
+  ], ids=["successful", "not_found", "wrong_user", "deactivation_failed"])
+  async def test_logout_by_refresh_token(self, use_case, mock_dependencies, token_blacklist, current_user_id, test_session,
+                                         session_owner, deactivate_return, expected) -> None:
+      """Test déconnexion par refresh token"""
+      if session_owner == "other":
+          test_session.user_id = UUID_POOL[1]
       refresh_token = "valid_refresh_token"
       token_hash = "hashed_token"
       request = LogoutUserRequest(refresh_token=refresh_token)
 
-      mock_dependencies["jwt_service"].hash_refresh_token = Mock(return_value=token_hash)
-      mock_dependencies["session_repository"].find_by_refresh_token_hash.return_value = test_session
-      mock_dependencies["session_repository"].deactivate_session.return_value = True
+      mock_dependencies["jwt_service"].hash_refresh_token.return_value = token_hash
+      mock_dependencies["session_repository"].find_by_refresh_token_hash.return_value = test_session if session_owner else None
+      mock_dependencies["session_repository"].deactivate_session.return_value = deactivate_return
 
       # Execute
       result = await use_case.execute(request, current_user_id)
 
       # Assert
-      assert result.success is True
-      assert result.sessions_revoked == 1
-      assert result.message == "Successfully logged out"
+      assert (result.success, result.sessions_revoked, result.message) == expected
       mock_dependencies["jwt_service"].hash_refresh_token.assert_called_once_with(refresh_token)
       mock_dependencies["session_repository"].find_by_refresh_token_hash.assert_called_once_with(token_hash)
-      mock_dependencies["session_repository"].deactivate_session.assert_called_once_with(test_session.id)
-
-  @pytest.mark.asyncio
-  async def test_logout_by_refresh_token_not_found(self, use_case, mock_dependencies, current_user_id) -> None:
-      """Test déconnexion par refresh token non trouvé"""
-      refresh_token = "invalid_refresh_token"
-      token_hash = "hashed_token"
-      request = LogoutUserRequest(refresh_token=refresh_token)
-
-      mock_dependencies["jwt_service"]._hash_refresh_token = Mock(return_value=token_hash)
-      mock_dependencies["session_repository"].find_by_refresh_token_hash.return_value = None
-
-      # Execute
-      result = await use_case.execute(request, current_user_id)
-
-      # Assert
-      assert result.success is False
-      assert result.sessions_revoked == 0
-      assert result.message == "Invalid refresh token or access denied"
-
-  @pytest.mark.asyncio
-  async def test_logout_by_refresh_token_wrong_user(self, use_case, mock_dependencies, current_user_id, test_session) -> None:
-      """Test déconnexion par refresh token appartenant à un autre utilisateur"""
-      other_user_id = uuid4()
-      test_session.user_id = other_user_id
-      refresh_token = "valid_refresh_token"
-      token_hash = "hashed_token"
-      request = LogoutUserRequest(refresh_token=refresh_token)
-
-      mock_dependencies["jwt_service"]._hash_refresh_token = Mock(return_value=token_hash)
-      mock_dependencies["session_repository"].find_by_refresh_token_hash.return_value = test_session
-
-      # Execute
-      result = await use_case.execute(request, current_user_id)
-
-      # Assert
-      assert result.success is False
-      assert result.sessions_revoked == 0
-      assert result.message == "Invalid refresh token or access denied"
-      mock_dependencies["session_repository"].deactivate_session.assert_not_called()
-
-  @pytest.mark.asyncio
-  async def test_logout_by_refresh_token_deactivation_failed(self, use_case, mock_dependencies, current_user_id, test_session) -> None:
-      """Test déconnexion par refresh token avec échec de désactivation"""
-      refresh_token = "valid_refresh_token"
-      token_hash = "hashed_token"
-      request = LogoutUserRequest(refresh_token=refresh_token)
-
-      mock_dependencies["jwt_service"]._hash_refresh_token = Mock(return_value=token_hash)
-      mock_dependencies["session_repository"].find_by_refresh_token_hash.return_value = test_session
-      mock_dependencies["session_repository"].deactivate_session.return_value = False
+      if deactivate_return is None:
+          mock_dependencies["session_repository"].deactivate_session.assert_not_called()
+      else:
+          mock_dependencies["session_repository"].deactivate_session.assert_called_once_with(test_session.id)
+      if deactivate_return:
+          token_blacklist.revoke_session.assert_called_once_with(str(test_session.id), ACCESS_EXP_S)
+      else:
+          token_blacklist.revoke_session.assert_not_called()
+
+  async def test_blacklist_failure_does_not_break_logout(self, use_case, mock_dependencies, token_blacklist,
+                                                         current_user_id, test_session) -> None:
+      """Test qu'un Redis indisponible n'empêche pas la désactivation de la session"""
+      request = LogoutUserRequest(session_id=test_session.id)
+      mock_dependencies["session_repository"].find_by_id.return_value = test_session
+      mock_dependencies["session_repository"].deactivate_session.return_value = True
+      token_blacklist.revoke_session.side_effect = ConnectionError("Redis down")
 
-      # Execute
       result = await use_case.execute(request, current_user_id)
 
-      # Assert
-      assert result.success is False
-      assert result.sessions_revoked == 0
-      assert result.message == "Failed to logout"
+      assert result.success is True
+      mock_dependencies["session_repository"].deactivate_session.assert_called_once_with(test_session.id)
 
-  @pytest.mark.asyncio
   async def test_logout_no_method_specified(self, use_case, mock_dependencies, current_user_id) -> None:
       """Test déconnexion sans méthode spécifiée"""
       request = LogoutUserRequest()  # Aucune méthode
 
       # Execute & Assert
-      with pytest.raises(ValueError, match="Must specify either logout_all=True, session_id, or refresh_token"):
+      with pytest.raises(ValueError, match=_RE_NO_METHOD):
           await use_case.execute(request, current_user_id)
 
   def test_validation_no_method_specified(self, use_case) -> None:
       """Test validation sans méthode spécifiée"""
       request = LogoutUserRequest()
 
-      with pytest.raises(ValueError, match="Must specify either logout_all=True, session_id, or refresh_token"):
+      with pytest.raises(ValueError, match=_RE_NO_METHOD):
           use_case._validate_request(request)
 
   def test_validation_logout_all_true(self, use_case) -> None:
@@ -236,9 +160,9 @@ class TestLogoutUser:
       # Should not raise
       use_case._validate_request(request)
 
-  def test_validation_with_session_id(self, use_case) -> None:
+  def test_validation_with_session_id(self, use_case, uuid_pool) -> None:
       """Test validation avec session_id (valide)"""
-      request = LogoutUserRequest(session_id=uuid4())
+      request = LogoutUserRequest(session_id=next(uuid_pool))
 
       # Should not raise
       use_case._validate_request(request)
@@ -254,7 +178,7 @@ class TestLogoutUser:
       """Test validation avec plusieurs méthodes (permis)"""
       request = LogoutUserRequest(
           logout_all=True,
-          session_id=uuid4(),
+          session_id=UUID_POOL[2],
           refresh_token="token"
       )
 
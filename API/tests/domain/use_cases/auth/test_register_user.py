@@ -27,7 +27,6 @@ class TestRegisterUser:
           password="password123"
       )
 
-  @pytest.mark.asyncio
   async def test_successful_registration(self, use_case, mock_dependencies, valid_request) -> None:
       """Test inscription réussie"""
       # Setup mocks
@@ -42,7 +41,6 @@ class TestRegisterUser:
       assert result.user_id is not None
       mock_dependencies["user_repository"].save.assert_called_once()
 
-  @pytest.mark.asyncio
   async def test_username_already_exists(self, use_case, mock_dependencies, valid_request) -> None:
       """Test username déjà existant"""
       mock_dependencies["user_repository"].exists_by_username.return_value = True
@@ -50,7 +48,6 @@ class TestRegisterUser:
       with pytest.raises(UserAlreadyExistsError):
           await use_case.execute(valid_request)
 
-  @pytest.mark.asyncio
   async def test_email_already_exists(self, use_case, mock_dependencies, valid_request) -> None:
       """Test email déjà existant"""
       mock_dependencies["user_repository"].exists_by_username.return_value = False
@@ -0,0 +1,75 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+
+from app.services.blob_storage_service import AzureBlobStorageService
+from app.services.redis_queue_service import RedisQueueService
+
+
+# Services partagés par tous les tests de connexion : pool HTTP/Redis, TLS et DNS
+# ne sont établis qu'une fois. La boucle d'événements est de portée session pour
+# ces fixtures et les tests qui les utilisent (loop_scope="session").
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def azure_blob_service():
+    """AzureBlobStorageService ouvert pour la session"""
+    service = AzureBlobStorageService()
+    yield service
+    await service.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def redis_queue_service():
+    """RedisQueueService ouvert pour la session"""
+    service = RedisQueueService()
+    yield service
+    await service.close()
+
+
+class FakeRedis:
+    """Redis en mémoire couvrant les commandes utilisées par RedisQueueService"""
+
+    def __init__(self):
+        self.store = {}
+        self.lists = {}
+
+    async def ping(self):
+        return True
+
+    async def setex(self, name, time, value):
+        self.store[name] = value.encode() if isinstance(value, str) else value
+
+    async def get(self, name):
+        return self.store.get(name)
+
+    async def lpush(self, name, *values):
+        queue = self.lists.setdefault(name, [])
+        for value in values:
+            queue.insert(0, value.encode() if isinstance(value, str) else value)
+        return len(queue)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def local_blob_service(monkeypatch):
+    """AzureBlobStorageService branché sur un faux BlobServiceClient (aucun appel réseau)"""
+    fake_client = MagicMock()
+    fake_client.close = AsyncMock()
+    blob_client = fake_client.get_container_client.return_value.get_blob_client.return_value
+    blob_client.upload_blob = AsyncMock()
+    blob_client.delete_blob = AsyncMock()
+
+    service = AzureBlobStorageService()
+    monkeypatch.setattr(service, "_client", fake_client)
+    return service
+
+
+@pytest.fixture
+def local_redis_queue_service(monkeypatch):
+    """RedisQueueService branché sur FakeRedis (aucun appel réseau)"""
+    service = RedisQueueService()
+    monkeypatch.setattr(service, "_redis", FakeRedis())
+    return service
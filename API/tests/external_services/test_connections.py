@@ -1,58 +1,61 @@
 """
 Tests de connexion aux dépendances externes (Azure, Redis)
-Usage: pytest -m connection -v
+Usage: pytest -m connection --run-remote -v
+
+Les variantes locales (*_local) vérifient le câblage des services sur des faux
+clients et tournent à chaque exécution ; les variantes remote appellent les vrais services.
 """
 
 import asyncio
 import sys
 import pytest
+from contextlib import AsyncExitStack
 from io import BytesIO
 from uuid import uuid4
 
 from app.config import settings
-from app.services.blob_storage_service import AzureBlobStorageService
-from app.services.redis_queue_service import RedisQueueService
+from app.services.redis_queue_service import pack_job_data, unpack_job_data
 
 
 @pytest.mark.connection
 @pytest.mark.external_deps
-@pytest.mark.asyncio
-async def test_azure_blob_connection():
+@pytest.mark.remote
+@pytest.mark.asyncio(loop_scope="session")
+async def test_azure_blob_connection(azure_blob_service):
     """Test de connexion Azure Blob Storage"""
     print("🔵 Testing Azure Blob Storage...")
 
-    service = None
-    file_path = None
+    service = azure_blob_service
 
     try:
-        service = AzureBlobStorageService()
-
-        # Test avec un petit fichier
-        test_content = b"Test image content for GameAdvisor"
-        filename = f"test_image_{uuid4().hex[:8]}.jpg"
-
-        # Path direct dans test/ au lieu de games/
-        file_path = f"test/{filename}"
+        # Le nettoyage est déroulé par la pile à la sortie, succès ou échec ; la fermeture
+        # du service (transport aiohttp partagé) est faite par la fixture en fin de session
+        async with AsyncExitStack() as stack:
+            # Test avec un petit fichier
+            test_content = b"Test image content for GameAdvisor"
+            filename = f"test_image_{uuid4().hex[:8]}.jpg"
 
-        print(f"   Uploading test file: {filename}")
+            # Path direct dans test/ au lieu de games/
+            file_path = f"test/{filename}"
 
-        # Upload direct sans passer par upload_image()
-        container_client = service.client.get_container_client(settings.azure_blob_container_name)
-        blob_client = container_client.get_blob_client(file_path)
+            print(f"   Uploading test file: {filename}")
 
-        await blob_client.upload_blob(
-            test_content,
-            overwrite=True,
-            content_type="image/jpeg"
-        )
+            # Upload direct sans passer par upload_image() ; delete_image() ne lève pas
+            container_client = service.client.get_container_client(settings.azure_blob_container_name)
+            blob_client = container_client.get_blob_client(file_path)
+            stack.push_async_callback(service.delete_image, file_path)
 
-        blob_url = f"{settings.azure_blob_url}/{settings.azure_blob_container_name}/{file_path}"
+            await blob_client.upload_blob(
+                test_content,
+                overwrite=True,
+                content_type="image/jpeg"
+            )
 
-        print(f"   ✅ Upload successful!")
-        print(f"   📁 File path: {file_path}")
-        print(f"   🔗 Blob URL: {blob_url}")
+            blob_url = f"{settings.azure_blob_url}/{settings.azure_blob_container_name}/{file_path}"
 
-        assert True, "Azure Blob Storage connection successful"
+            print(f"   ✅ Upload successful!")
+            print(f"   📁 File path: {file_path}")
+            print(f"   🔗 Blob URL: {blob_url}")
 
     except Exception as e:
         error_msg = str(e)
@@ -63,37 +66,18 @@ async def test_azure_blob_connection():
         else:
             pytest.fail(f"Azure Blob Storage Error: {e}")
 
-    finally:
-        # Nettoyage du fichier
-        if file_path and service:
-            try:
-                print(f"   🗑️  Cleaning up test file...")
-                deleted = await service.delete_image(file_path)
-                print(f"   ✅ Cleanup: {'Success' if deleted else 'Failed'}")
-            except Exception as cleanup_error:
-                print(f"   ⚠️ Cleanup failed: {cleanup_error}")
-        
-        # Fermeture du service
-        if service and hasattr(service, 'close'):
-            try:
-                await service.close()
-            except Exception as close_error:
-                print(f"   ⚠️ Service close failed: {close_error}")
-
 
 @pytest.mark.connection
 @pytest.mark.external_deps
-@pytest.mark.asyncio
-async def test_redis_queue_connection():
+@pytest.mark.remote
+@pytest.mark.asyncio(loop_scope="session")
+async def test_redis_queue_connection(redis_queue_service):
   """Test de connexion Redis"""
   print("🔴 Testing Redis Queue...")
 
-  service = None
-  job_id = None
+  service = redis_queue_service
 
   try:
-      service = RedisQueueService()
-
       # Paramètres de test
       test_image_id = uuid4()
       test_game_id = uuid4()
@@ -113,24 +97,79 @@ async def test_redis_queue_connection():
       status = await service.get_job_status(job_id)
       print(f"   📊 Job status: {status}")
 
+      # Vérifier l'aller-retour msgpack des données stockées
+      redis_client = await service._get_redis()
+      raw_job = await redis_client.get(f"{service.JOB_DATA_PREFIX}{job_id}")
+      job_info = unpack_job_data(raw_job)
+      assert job_info["image_id"] == test_image_id
+      assert job_info["game_id"] == test_game_id
+
       assert True, "Redis Queue connection successful"
 
   except Exception as e:
       pytest.fail(f"Redis Queue Error: {e}")
 
-  finally:
-      # Nettoyage garanti
-      if service:
-          try:
-              # Nettoyer le job de test si possible
-              if job_id:
-                  # TODO: Ajouter méthode pour supprimer un job de test
-                  pass
 
-              await service.close()
-              print(f"   ✅ Connection closed")
-          except Exception as close_error:
-              print(f"   ⚠️ Service close failed: {close_error}")
+async def test_azure_blob_local(local_blob_service):
+  """Câblage upload/suppression du service blob, sans Azure"""
+  game_id, image_id = uuid4(), uuid4()
+
+  file_path, blob_url = await local_blob_service.upload_image(
+      game_id, image_id, BytesIO(b"Test image content"), "test.jpg", "image/jpeg"
+  )
+
+  assert file_path == f"games/{game_id}/images/{image_id}_test.jpg"
+  assert blob_url.endswith(file_path)
+  blob_client = local_blob_service.client.get_container_client.return_value.get_blob_client.return_value
+  blob_client.upload_blob.assert_awaited_once()
+  assert await local_blob_service.delete_image(file_path) is True
+
+
+async def test_redis_queue_local(local_redis_queue_service):
+  """Câblage enqueue/statut du service de queue, sans Redis"""
+  test_image_id, test_game_id = uuid4(), uuid4()
+
+  job_id = await local_redis_queue_service.enqueue_image_processing(
+      image_id=test_image_id,
+      game_id=test_game_id,
+      blob_path="test/path.jpg",
+      filename="test.jpg"
+  )
+
+  assert await local_redis_queue_service.get_job_status(job_id) == "queued"
+  redis_client = await local_redis_queue_service._get_redis()
+  job_info = unpack_job_data(await redis_client.get(f"{local_redis_queue_service.JOB_DATA_PREFIX}{job_id}"))
+  assert job_info["image_id"] == test_image_id
+  assert job_info["game_id"] == test_game_id
+  assert redis_client.lists[local_redis_queue_service.QUEUE_NAME] == [job_id.encode()]
+
+
+def test_job_data_msgpack_roundtrip():
+  """Test de sérialisation msgpack des données de job (sans Redis)"""
+  job_data = {
+      "job_id": "job_test",
+      "image_id": uuid4(),
+      "game_id": uuid4(),
+      "blob_path": "test/path.jpg",
+      "filename": "test.jpg",
+      "batch_id": None,
+      "retry_count": 0,
+      "max_retries": 3,
+      "metadata": {},
+      "created_at": "2025-01-01T00:00:00+00:00",
+  }
+
+  packed = pack_job_data(job_data)
+
+  assert isinstance(packed, bytes)
+  assert unpack_job_data(packed) == job_data
+
+
+def test_job_data_json_fallback():
+  """Les jobs stockés en JSON avant la migration msgpack restent lisibles"""
+  legacy = b'{"job_id": "job_legacy", "retry_count": 1}'
+
+  assert unpack_job_data(legacy) == {"job_id": "job_legacy", "retry_count": 1}
 
 
 @pytest.mark.connection
@@ -173,7 +212,7 @@ def test_config():
 
 
 # Pour exécuter ces tests :
-# pytest -m connection -v  # Tests de connexion uniquement
-# pytest -m external_deps -v  # Tous les tests de dépendances externes
+# pytest -m connection --run-remote -v  # Tests de connexion uniquement
+# pytest -m external_deps --run-remote -v  # Tous les tests de dépendances externes
 
 
@@ -1,12 +1,13 @@
-from time import sleep
+from datetime import datetime, timedelta
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 from httpx import AsyncClient
+from jose import jwt
 
 class TestAuthenticationFlow:
     @pytest.mark.asyncio
-    async def test_complete_auth_flow(self, async_client: AsyncClient, db_session: AsyncSession, test_user_data) -> None:
+    async def test_complete_auth_flow(self, async_client: AsyncClient, db_session: AsyncSession, test_user_data, monkeypatch) -> None:
         """Test flux complet : register → login → refresh → logout"""
 
         # 1. Register
@@ -27,7 +28,13 @@ class TestAuthenticationFlow:
         assert me_response.status_code == 200
 
         # 4. Refresh tokens
-        sleep(1)
+        # Avancer l'horloge du JWT service plutôt que dormir : les nouveaux tokens ont un iat/exp différent
+        class _AdvancedDateTime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(seconds=2)
+
+        monkeypatch.setattr("app.services.jwt_service.datetime", _AdvancedDateTime)
         refresh_response = await async_client.post("/auth/refresh", json={
             "refresh_token": tokens["refresh_token"]
         })
@@ -48,4 +55,111 @@ class TestAuthenticationFlow:
         logout_response = await async_client.post("/auth/logout", json={
             "refresh_token": new_tokens["refresh_token"]
         }, headers={"Authorization": f"Bearer {new_tokens['access_token']}"})
-        assert logout_response.status_code == 200
\ No newline at end of file
+        assert logout_response.status_code == 200
+
+    async def _register_and_login_twice(self, async_client: AsyncClient, test_user_data) -> tuple[dict, dict]:
+        """Inscrit l'utilisateur et ouvre deux sessions (deux appareils)"""
+        register_response = await async_client.post("/auth/register", json=test_user_data)
+        assert register_response.status_code == 201
+
+        credentials = {"username": test_user_data["username"], "password": test_user_data["password"]}
+        first_response = await async_client.post("/auth/login", data=credentials)
+        second_response = await async_client.post("/auth/login", data=credentials)
+        assert first_response.status_code == 200
+        assert second_response.status_code == 200
+        return first_response.json(), second_response.json()
+
+    @staticmethod
+    def _auth_headers(tokens: dict) -> dict:
+        return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    @pytest.mark.asyncio
+    async def test_logout_revokes_only_its_access_token(self, async_client: AsyncClient, test_user_data) -> None:
+        """Test que le logout révoque l'access token de sa session, sans toucher à l'autre session"""
+        first, second = await self._register_and_login_twice(async_client, test_user_data)
+
+        logout_response = await async_client.post("/auth/logout", json={
+            "refresh_token": first["refresh_token"]
+        }, headers=self._auth_headers(first))
+        assert logout_response.status_code == 200
+
+        # L'utilisateur garde une session active : seule la session révoquée explique le 401
+        revoked_response = await async_client.get("/auth/me", headers=self._auth_headers(first))
+        assert revoked_response.status_code == 401
+
+        other_response = await async_client.get("/auth/me", headers=self._auth_headers(second))
+        assert other_response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_logout_other_session_revokes_its_access_token(self, async_client: AsyncClient, test_user_data) -> None:
+        """Test que déconnecter une autre session par son ID révoque ses tokens, pas ceux de l'appelant"""
+        first, second = await self._register_and_login_twice(async_client, test_user_data)
+        second_session_id = jwt.get_unverified_claims(second["access_token"])["sid"]
+
+        logout_response = await async_client.post("/auth/logout", json={
+            "session_id": second_session_id
+        }, headers=self._auth_headers(first))
+        assert logout_response.status_code == 200
+
+        revoked_response = await async_client.get("/auth/me", headers=self._auth_headers(second))
+        assert revoked_response.status_code == 401
+
+        caller_response = await async_client.get("/auth/me", headers=self._auth_headers(first))
+        assert caller_response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_logout_all_revokes_every_access_token(self, async_client: AsyncClient, test_user_data) -> None:
+        """Test que le logout global révoque les access tokens de toutes les sessions"""
+        first, second = await self._register_and_login_twice(async_client, test_user_data)
+
+        logout_response = await async_client.post("/auth/logout", json={
+            "logout_all": True
+        }, headers=self._auth_headers(first))
+        assert logout_response.status_code == 200
+
+        for tokens in (first, second):
+            response = await async_client.get("/auth/me", headers=self._auth_headers(tokens))
+            assert response.status_code == 401
+
+        # Une nouvelle connexion après le logout global reste valide
+        login_response = await async_client.post("/auth/login", data={
+            "username": test_user_data["username"],
+            "password": test_user_data["password"]
+        })
+        me_response = await async_client.get("/auth/me", headers=self._auth_headers(login_response.json()))
+        assert me_response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_blacklist_unavailable_falls_back_to_sessions(self, async_client: AsyncClient, test_user_data, mock_azure_services) -> None:
+        """Test que Redis injoignable n'empêche pas l'authentification : repli sur les sessions en base"""
+        first, _ = await self._register_and_login_twice(async_client, test_user_data)
+        mock_azure_services["blacklist_service"].available = False
+
+        me_response = await async_client.get("/auth/me", headers=self._auth_headers(first))
+        assert me_response.status_code == 200
+
+        # Le logout aboutit malgré la révocation impossible ; la base rejette ensuite le token
+        logout_response = await async_client.post("/auth/logout", json={
+            "logout_all": True
+        }, headers=self._auth_headers(first))
+        assert logout_response.status_code == 200
+
+        revoked_response = await async_client.get("/auth/me", headers=self._auth_headers(first))
+        assert revoked_response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_blacklist_unavailable_checks_token_session(self, async_client: AsyncClient, test_user_data, mock_azure_services) -> None:
+        """Test que sans Redis, la base rejette le token d'une session déconnectée même s'il en reste d'autres"""
+        first, second = await self._register_and_login_twice(async_client, test_user_data)
+        mock_azure_services["blacklist_service"].available = False
+
+        logout_response = await async_client.post("/auth/logout", json={
+            "refresh_token": first["refresh_token"]
+        }, headers=self._auth_headers(first))
+        assert logout_response.status_code == 200
+
+        revoked_response = await async_client.get("/auth/me", headers=self._auth_headers(first))
+        assert revoked_response.status_code == 401
+
+        other_response = await async_client.get("/auth/me", headers=self._auth_headers(second))
+        assert other_response.status_code == 200
@@ -1,4 +1,5 @@
 import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 from uuid import uuid4
 
@@ -57,6 +58,31 @@ class TestJWTService:
         assert payload["username"] == user_data["username"]
         assert payload["type"] == "access_token"
 
+    def test_access_tokens_have_unique_jti(self, jwt_service: IJWTService, user_data: dict) -> None:
+        """Test que chaque access token porte son propre jti"""
+        token1 = jwt_service.create_token_pair(**user_data)[0]
+        token2 = jwt_service.create_token_pair(**user_data)[0]
+
+        jti1 = jwt_service.verify_access_token(token1)["jti"]
+        jti2 = jwt_service.verify_access_token(token2)["jti"]
+
+        assert jti1 and jti2
+        assert jti1 != jti2
+
+    def test_access_token_bound_to_session(self, jwt_service: IJWTService, user_data: dict) -> None:
+        """Test que l'access token porte l'ID de sa session et n'expire pas après elle"""
+        session_id = uuid4()
+        session_expires_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+        access_token, _, _, access_exp, _ = jwt_service.create_token_pair(
+            **user_data, session_id=session_id, session_expires_at=session_expires_at
+        )
+
+        payload = jwt_service.verify_access_token(access_token)
+        assert payload["sid"] == str(session_id)
+        assert access_exp <= 60
+        assert payload["exp"] <= session_expires_at.timestamp()
+
     def test_verify_expired_token(self, jwt_service: IJWTService, user_data: dict) -> None:
         """Test rejet d'un token expiré"""
         with patch.object(jwt_service, '_access_token_expire_minutes', -1):
@@ -5,9 +5,14 @@ from app.services.password_service import PasswordService
 
 
 class TestPasswordService:
-  @pytest.fixture
+  @pytest.fixture(scope="module")
   def password_service(self) -> IPasswordService:
-      return PasswordService()
+      """Service sans état : un seul CryptContext pour tout le module.
+
+      Coût bcrypt minimal (4) : mêmes chemins de code, hachage ~256x moins coûteux ;
+      le préfixe $2b$ ne dépend que de la variante, pas du coût.
+      """
+      return PasswordService(bcrypt_rounds=4)
 
   def test_hash_password(self, password_service: IPasswordService) -> None:
       """Test hachage password"""
@@ -1,123 +1,240 @@
+import asyncio
+import base64
+import logging
+import threading
+from collections import deque
+
+from classes.log_config import configure_logger
 from classes.settings import Settings
 
+logger = logging.getLogger(__name__)
+
 
 class AgentManager:
 
     _instance = None
-    _chat_model = None
-    _settings: Settings = None
-    _conversation_history = []
+    _instance_lock = threading.Lock()
+    _SYS_PROMPT_CACHE_SIZE = 4
+    # Data-URI des dernières images RAG envoyées, réutilisées d'une question à l'autre
+    _DATA_URI_CACHE_SIZE = 16
+    # Poids forfaitaire d'une image dans l'estimation de taille des messages
+    _IMAGE_PART_CHARS = 50
+    # 10 derniers échanges (question + réponse)
+    _HISTORY_MAXLEN = 20
+
+    # Gabarits du prompt système (str.format), par forme de contexte RAG
+    _TEMPLATE_HYBRID = (
+        "{base}\n\n"
+        "CONTEXTE RAG HYBRIDE:\n"
+        "{ctx}\n\n"
+        "IMPORTANT: Tu recevras {n} images de contexte avec cette question. \n"
+        "Ces images contiennent des règles, schémas ou diagrammes pertinents à la question.\n"
+        "Analyse ces images en détail et utilise-les comme référence principale pour ta réponse.\n"
+        "Combine l'information textuelle ci-dessus avec l'analyse visuelle des images."
+    )
+    _TEMPLATE_TEXT = (
+        "{base}\n\n"
+        "CONTEXTE ADDITIONNEL DES RÈGLES:\n"
+        "{ctx}\n\n"
+        "Utilise ce contexte pour enrichir tes réponses, mais reste précis et factuel."
+    )
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._init_state()
+                cls._instance = instance
         return cls._instance
 
+    def _init_state(self):
+        """État mutable porté par l'instance (et non par la classe)"""
+        self._chat_model = None
+        self._settings: Settings = None
+        self._conversation_history = deque(maxlen=self._HISTORY_MAXLEN)
+        self._history_chars = 0
+        self._sys_prompt_cache = {}
+        self._data_uri_cache = {}
+        self._lock = threading.Lock()
+
     def initialize(self, settings, tools):
-        self._settings = settings
-        if self._chat_model is None:
-            self._chat_model = settings.agent_model
+        with self._lock:
+            self._settings = settings
+            self._sys_prompt_cache.clear()
+            # Le paramètre debug pilote les logs détaillés de l'agent
+            configure_logger(logger, settings.params.get("debug", False))
+            if self._chat_model is None:
+                self._chat_model = settings.agent_model
         return self
 
     def invoke(self, message_data, rag_context=None):
         """Appel direct au modèle Azure OpenAI avec support RAG hybride"""
+        messages, rag_images, user_text = self._prepare_messages(message_data, rag_context)
+
+        # Appeler le modèle
+        response = self._chat_model.invoke(messages)
+
+        return self._record_exchange(user_text, rag_images, response)
+
+    async def ainvoke(self, message_data, rag_context=None):
+        """Variante async de invoke : l'appel au modèle ne bloque pas la boucle d'événements"""
+        messages, rag_images, user_text = self._prepare_messages(message_data, rag_context)
+
+        if hasattr(self._chat_model, "ainvoke"):
+            response = await self._chat_model.ainvoke(messages)
+        else:
+            response = await asyncio.to_thread(self._chat_model.invoke, messages)
+
+        return self._record_exchange(user_text, rag_images, response)
+
+    def _prepare_messages(self, message_data, rag_context):
+        """Construit les messages envoyés au modèle, retourne (messages, rag_images, user_text)"""
 
         # Analyser le contexte RAG pour déterminer s'il y a des images
         rag_images = []
-        if rag_context and isinstance(rag_context, dict) and rag_context.get("type") == "hybrid":
+        rag_kind = self._rag_kind(rag_context)
+        if rag_kind == "hybrid":
             rag_images = rag_context.get("images", [])
             print(f"🖼️ Agent: Contexte RAG hybride avec {len(rag_images)} images")
             
-            # Logs détaillés des images reçues
-            for i, img in enumerate(rag_images, 1):
-                original_name = img['metadata'].get('original_name', 'inconnu')
-                image_id = img.get('image_id', 'inconnu')
-                image_size = len(img['image_data']) // 1024 if 'image_data' in img else 0
-                print(f"   📄 Image RAG {i}: {original_name} (ID: {image_id}, ~{image_size}KB)")
-        elif rag_context and isinstance(rag_context, dict) and rag_context.get("type") == "text":
-            context_preview = rag_context.get("context", "")[:100] + "..." if len(rag_context.get("context", "")) > 100 else rag_context.get("context", "")
+            # Logs détaillés des images reçues (boucle entière sautée hors debug)
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, img in enumerate(rag_images, 1):
+                    original_name = img['metadata'].get('original_name', 'inconnu')
+                    image_id = img.get('image_id', 'inconnu')
+                    image_size = len(img['image_data']) // 1024 if 'image_data' in img else 0
+                    logger.debug("   📄 Image RAG %d: %s (ID: %s, ~%dKB)", i, original_name, image_id, image_size)
+        elif rag_kind == "text":
             print(f"📝 Agent: Contexte RAG classique")
-            print(f"   💬 Contexte: {context_preview}")
-        elif rag_context and isinstance(rag_context, str):
-            context_preview = rag_context[:100] + "..." if len(rag_context) > 100 else rag_context
+            if logger.isEnabledFor(logging.DEBUG):
+                context = rag_context.get("context", "")
+                context_preview = context[:100] + "..." if len(context) > 100 else context
+                logger.debug("   💬 Contexte: %s", context_preview)
+        elif rag_kind == "str":
             print(f"📝 Agent: Contexte RAG textuel (ancien format)")
-            print(f"   💬 Contexte: {context_preview}")
+            if logger.isEnabledFor(logging.DEBUG):
+                context_preview = rag_context[:100] + "..." if len(rag_context) > 100 else rag_context
+                logger.debug("   💬 Contexte: %s", context_preview)
 
         # Préparer les messages (contexte RAG intégré dans le system prompt)
         messages = [{"role": "system", "content": self._build_system_prompt(rag_context)}]
 
-        # Ajouter l'historique de conversation
-        messages.extend(self._conversation_history)
+        # Ajouter l'historique de conversation (instantané sous verrou)
+        with self._lock:
+            messages.extend(self._conversation_history)
+            history_chars = self._history_chars
         
-        # Traiter le message utilisateur
-        user_content = self._build_user_content(message_data["input"], rag_images)
+        # Traiter le message utilisateur (type de l'entrée et texte seul calculés une fois)
+        raw_input = message_data["input"]
+        is_text = isinstance(raw_input, str)
+        user_text = raw_input if is_text else " ".join(
+            part["text"] for part in raw_input if part.get("type") == "text"
+        )
+        user_content = self._build_user_content(raw_input, rag_images, is_text)
         user_message = {"role": "user", "content": user_content}
         
         messages.append(user_message)
         
-        # Debug: compter les tokens approximativement
-        total_chars = sum(len(str(msg)) for msg in messages)
-        print(f"DEBUG: Envoi de ~{total_chars} caractères ({total_chars//4} tokens approx)")
-        print(f"DEBUG: {len(messages)} messages, {len(rag_images)} images RAG")
-        
-        # Appeler le modèle
-        response = self._chat_model.invoke(messages)
-        
+        # Debug: compter les tokens approximativement (historique compté au fil de l'eau)
+        if logger.isEnabledFor(logging.DEBUG):
+            total_chars = history_chars + len(messages[0]["content"]) + self._content_chars(user_content)
+            logger.debug("DEBUG: Envoi de ~%d caractères (%d tokens approx)", total_chars, total_chars // 4)
+            logger.debug("DEBUG: %d messages, %d images RAG", len(messages), len(rag_images))
+
+        return messages, rag_images, user_text
+
+    def _record_exchange(self, user_text, rag_images, response):
+        """Enregistre l'échange dans l'historique et formate la sortie"""
         # Sauvegarder dans l'historique (sans les images pour économiser les tokens)
-        history_user_message = self._create_history_user_message(message_data["input"], rag_images)
-        
-        self._conversation_history.append(history_user_message)
-        self._conversation_history.append({"role": "assistant", "content": response.content})
+        history_user_message = self._create_history_user_message(user_text, rag_images)
         
-        # Limiter l'historique (garder seulement les 10 derniers échanges)
-        if len(self._conversation_history) > 20:
-            self._conversation_history = self._conversation_history[-20:]
+        # Le deque borné évince les plus anciens messages (10 derniers échanges conservés)
+        with self._lock:
+            self._append_history(history_user_message)
+            self._append_history({"role": "assistant", "content": response.content})
         
         return {"output": response.content}
     
-    def _build_user_content(self, input_content, rag_images):
+    def _append_history(self, message):
+        """Ajoute un message à l'historique en tenant à jour le compteur de caractères (appelant détient self._lock)"""
+        if len(self._conversation_history) == self._conversation_history.maxlen:
+            # Le message le plus ancien va être évincé par le deque
+            self._history_chars -= self._content_chars(self._conversation_history[0]["content"])
+        self._history_chars += self._content_chars(message["content"])
+        self._conversation_history.append(message)
+
+    @classmethod
+    def _content_chars(cls, content):
+        """Estimation en caractères d'un contenu (str ou liste de content parts).
+
+        Les images comptent pour une constante : mesurer leur base64 n'a pas de sens pour une estimation de tokens.
+        """
+        if isinstance(content, str):
+            return len(content)
+        return sum(
+            len(part.get("text", "")) if part.get("type") == "text" else cls._IMAGE_PART_CHARS
+            for part in content
+        )
+
+    def _build_user_content(self, input_content, rag_images, is_text):
         """Construit le contenu utilisateur avec images RAG et question"""
-        if not rag_images and isinstance(input_content, str):
+        if not rag_images and is_text:
             # Cas simple : texte seul
             return input_content
         
-        # Construire contenu multimodal
-        content_parts = []
-        
-        # 1. Ajouter le texte de la question
-        if isinstance(input_content, str):
-            content_parts.append({"type": "text", "text": input_content})
+        # 1. Texte de la question
+        if is_text:
+            question_parts = [{"type": "text", "text": input_content}]
         else:
             # input_content est déjà une liste (images de question directe)
-            content_parts.extend(input_content)
-        
-        # 2. Ajouter les images du RAG hybride
-        if rag_images:
-            content_parts.append({
-                "type": "text", 
-                "text": f"\n\n🔍 CONTEXTE VISUEL RAG ({len(rag_images)} images pertinentes):"
-            })
-            
-            for i, rag_image in enumerate(rag_images, 1):
-                content_parts.append({
-                    "type": "text",
-                    "text": f"\n[Image RAG {i}] {rag_image['metadata'].get('original_name', 'document')}:"
-                })
-                content_parts.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/png;base64,{rag_image['image_data']}"}
-                })
-        
+            question_parts = input_content
+
+        if not rag_images:
+            return list(question_parts)
+
+        # 2. Images du RAG hybride : libellés préparés d'un bloc, l'en-tête fusionné
+        # dans le premier libellé pour éviter une content part texte isolée
+        labels = [
+            f"\n[Image RAG {i}] {rag_image['metadata'].get('original_name', 'document')}:"
+            for i, rag_image in enumerate(rag_images, 1)
+        ]
+        labels[0] = f"\n\n🔍 CONTEXTE VISUEL RAG ({len(rag_images)} images pertinentes):" + labels[0]
+
+        offset = len(question_parts)
+        content_parts = [None] * (offset + 2 * len(rag_images))
+        content_parts[:offset] = question_parts
+        for i, rag_image in enumerate(rag_images):
+            content_parts[offset + 2 * i] = {"type": "text", "text": labels[i]}
+            content_parts[offset + 2 * i + 1] = {
+                "type": "image_url",
+                "image_url": {"url": self._rag_image_data_uri(rag_image)}
+            }
+
         return content_parts
+
+    def _rag_image_data_uri(self, rag_image):
+        """Data-URI de l'image RAG, mémoïsée par image_id sur les dernières images envoyées"""
+        image_id = rag_image.get("image_id")
+        if image_id is not None:
+            cached = self._data_uri_cache.get(image_id)
+            if cached is not None:
+                return cached
+
+        image_data = rag_image["image_data"]
+        if isinstance(image_data, bytes):
+            image_data = base64.b64encode(image_data).decode("ascii")
+        uri = "data:image/png;base64," + image_data
+        if image_id is not None:
+            with self._lock:
+                self._data_uri_cache[image_id] = uri
+                if len(self._data_uri_cache) > self._DATA_URI_CACHE_SIZE:
+                    # Évincer la plus ancienne (ordre d'insertion des dict)
+                    del self._data_uri_cache[next(iter(self._data_uri_cache))]
+        return uri
     
-    def _create_history_user_message(self, input_content, rag_images):
+    def _create_history_user_message(self, user_text, rag_images):
         """Crée le message historique sans images pour économiser tokens"""
-        if isinstance(input_content, str):
-            text_content = input_content
-        else:
-            # Extraire seulement le texte des content parts
-            text_parts = [item["text"] for item in input_content if item.get("type") == "text"]
-            text_content = " ".join(text_parts)
+        text_content = user_text
         
         # Ajouter info sur les images sans les inclure
         if rag_images:
@@ -127,60 +244,75 @@ class AgentManager:
 
     def clear_memory(self):
         """Vider l'historique de conversation"""
-        self._conversation_history = []
+        with self._lock:
+            self._conversation_history.clear()
+            self._history_chars = 0
+
+    @staticmethod
+    def _rag_kind(rag_context):
+        """Forme du contexte RAG : "hybrid", "text", "str" (ancien format), "dict" (inconnu) ou None"""
+        if not rag_context:
+            return None
+        if isinstance(rag_context, str):
+            return "str"
+        if isinstance(rag_context, dict):
+            kind = rag_context.get("type")
+            return kind if kind in ("hybrid", "text") else "dict"
+        return None
+
+    @classmethod
+    def _system_prompt_key(cls, rag_context):
+        """Clé de cache du prompt système, None si le contexte n'est pas cachable"""
+        kind = cls._rag_kind(rag_context)
+        if kind == "str":
+            return ("str", rag_context)
+        if kind == "hybrid":
+            return ("hybrid", rag_context.get("image_count", 0), rag_context.get("context", ""))
+        if kind == "text":
+            return ("text", rag_context.get("context", ""))
+        return None
 
     def _build_system_prompt(self, rag_context=None):
+        """Construit le prompt système avec contexte RAG optionnel (mémoïsé sur les derniers contextes)"""
+        if not rag_context:
+            return self._settings.agent_prompt
+
+        key = self._system_prompt_key(rag_context)
+        if key is not None:
+            cached = self._sys_prompt_cache.get(key)
+            if cached is not None:
+                return cached
+
+        prompt = self._render_system_prompt(rag_context)
+        if key is not None:
+            with self._lock:
+                self._sys_prompt_cache[key] = prompt
+                if len(self._sys_prompt_cache) > self._SYS_PROMPT_CACHE_SIZE:
+                    # Évincer le plus ancien (ordre d'insertion des dict)
+                    del self._sys_prompt_cache[next(iter(self._sys_prompt_cache))]
+        return prompt
+
+    def _render_system_prompt(self, rag_context=None):
         """Construit le prompt système avec contexte RAG optionnel"""
         base_prompt = self._settings.agent_prompt
-        
-        if rag_context:
-            # Gérer les deux types de contexte RAG
-            if isinstance(rag_context, dict):
-                if rag_context.get("type") == "hybrid":
-                    # RAG Hybride : contexte textuel + info sur images
-                    context_text = rag_context.get("context", "")
-                    image_count = rag_context.get("image_count", 0)
-                    
-                    enhanced_prompt = f"""{base_prompt}
-
-CONTEXTE RAG HYBRIDE:
-{context_text}
-
-IMPORTANT: Tu recevras {image_count} images de contexte avec cette question. 
-Ces images contiennent des règles, schémas ou diagrammes pertinents à la question.
-Analyse ces images en détail et utilise-les comme référence principale pour ta réponse.
-Combine l'information textuelle ci-dessus avec l'analyse visuelle des images."""
-                
-                elif rag_context.get("type") == "text":
-                    # RAG Classique : contexte textuel seulement
-                    enhanced_prompt = f"""{base_prompt}
-
-CONTEXTE ADDITIONNEL DES RÈGLES:
-{rag_context.get("context", "")}
-
-Utilise ce contexte pour enrichir tes réponses, mais reste précis et factuel."""
-                
-                else:
-                    # Format dict inconnu, utiliser comme texte
-                    enhanced_prompt = f"""{base_prompt}
-
-CONTEXTE ADDITIONNEL DES RÈGLES:
-{str(rag_context)}
-
-Utilise ce contexte pour enrichir tes réponses, mais reste précis et factuel."""
-            
-            else:
-                # Ancien format string (compatibilité)
-                enhanced_prompt = f"""{base_prompt}
-
-CONTEXTE ADDITIONNEL DES RÈGLES:
-{rag_context}
+        if not rag_context:
+            return base_prompt
 
-Utilise ce contexte pour enrichir tes réponses, mais reste précis et factuel."""
-            
-            return enhanced_prompt
-        
-        return base_prompt
+        kind = self._rag_kind(rag_context)
+        if kind == "hybrid":
+            # RAG Hybride : contexte textuel + info sur images
+            return self._TEMPLATE_HYBRID.format(
+                base=base_prompt,
+                ctx=rag_context.get("context", ""),
+                n=rag_context.get("image_count", 0)
+            )
+        if kind == "text":
+            # RAG Classique : contexte textuel seulement
+            ctx = rag_context.get("context", "")
+        else:
+            # Ancien format string (compatibilité) ou dict inconnu, utilisé comme texte
+            ctx = str(rag_context)
+        return self._TEMPLATE_TEXT.format(base=base_prompt, ctx=ctx)
 
     @property
     def executor(self):
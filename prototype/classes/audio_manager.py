@@ -1,51 +1,106 @@
 import azure.cognitiveservices.speech as speechsdk
-import tempfile
-import os
+import asyncio
 import base64
-from typing import Optional, Union
+import bisect
+import contextlib
+import os
+import queue
+import threading
+from typing import Iterable, Iterator, List, Optional, Union
 import logging
 import io
+import time
+import wave
 
 from classes.settings import Settings
 
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-
 logger = logging.getLogger(__name__)
 
-class BinaryFileReaderCallback(speechsdk.audio.PullAudioInputStreamCallback):
+# Débit nominal supposé pour les formats compressés (~128 kbit/s, MP3 courant) :
+# les formats plus légers (Opus, AAC bas débit) sont envoyés plus vite que le temps réel
+COMPRESSED_BYTES_PER_SEC = 16000
+
+# Signatures des formats audio : (format, ((offset, magic), ...)), toutes les paires doivent correspondre
+AUDIO_SIGNATURES = (
+    ('wav', ((0, b'RIFF'), (8, b'WAVE'))),
+    ('mp3', ((0, b'ID3'),)),
+    ('mp3', ((0, b'\xff\xfb'),)),
+    ('m4a', ((4, b'ftyp'),)),
+    ('ogg', ((0, b'OggS'),)),
+    ('webm', ((0, b'\x1a\x45\xdf\xa3'),)),
+)
+# Configurations Azure Speech partagées par processus, par (clé, région), avec leur pool de synthétiseurs
+# et le format d'entrée compressé
+_SHARED_SPEECH = {}
+_SHARED_SPEECH_LOCK = threading.Lock()
+
+# Champs fixes du statut renvoyé par get_status
+_STATUS_TMPL = {
+    "recognition_language": "fr-FR",
+    "synthesis_voice": "fr-FR-DeniseNeural",
+    "synthesis_format": "audio/mpeg"
+}
+
+# Formats connus par type MIME (st.audio_input, enregistreur du navigateur), paramètres ignorés
+MIME_FORMATS = {
+    'audio/wav': 'wav',
+    'audio/x-wav': 'wav',
+    'audio/wave': 'wav',
+    'audio/mpeg': 'mp3',
+    'audio/mp3': 'mp3',
+    'audio/mp4': 'm4a',
+    'audio/x-m4a': 'm4a',
+    'audio/ogg': 'ogg',
+    'audio/webm': 'webm',
+}
+
+# Marques ISO-BMFF acceptées comme M4A (majeure ou compatibles, dans les 20 premiers octets)
+M4A_BRANDS = (b'M4A', b'mp41')
+
+class BytesReaderCallback(speechsdk.audio.PullAudioInputStreamCallback):
     """
-    Callback pour lire les fichiers audio compressés (WebM, OGG, MP3, etc.)
+    Callback pour lire un audio déjà en mémoire (compressé ou PCM)
     Basé sur la documentation Microsoft Azure Speech Service
+
+    Les lectures sont cadencées au temps réel au-delà d'une avance initiale :
+    un envoi glouton d'un long clip sature le buffer côté service ("client
+    buffer exceeded maximum size") et fait produire des partiels jetés.
     """
-    def __init__(self, filename: str):
+    # Secondes d'audio envoyées sans attente : une question courte n'est jamais ralentie
+    BURST_SECONDS = 5.0
+
+    def __init__(self, audio_bytes: bytes, bytes_per_sec: int):
         super().__init__()
-        self._file_h = open(filename, "rb")
+        # BytesIO partage le buffer des bytes tant qu'il n'est pas modifié : pas de copie
+        self._buf = io.BytesIO(audio_bytes)
+        self._total = len(audio_bytes)
+        self._bytes_per_sec = bytes_per_sec
+        self._burst_bytes = bytes_per_sec * self.BURST_SECONDS
+        self._t0 = None
+        self._sent = 0
 
     def read(self, buffer: memoryview) -> int:
-        """Lit les données audio depuis le fichier"""
+        """Copie directement les données audio dans le buffer du SDK, sans dépasser le temps réel"""
         try:
-            size = buffer.nbytes
-            frames = self._file_h.read(size)
-            
-            if not frames:
-                return 0
-                
-            buffer[:len(frames)] = frames
-            return len(frames)
+            if self._t0 is None:
+                self._t0 = time.monotonic()
+            wanted = min(buffer.nbytes, self._total - self._sent)
+            allowed = self._burst_bytes + self._bytes_per_sec * (time.monotonic() - self._t0) - self._sent
+            if allowed < wanted:
+                time.sleep((wanted - allowed) / self._bytes_per_sec)
+            n = self._buf.readinto(buffer)
+            self._sent += n
+            return n
         except Exception as e:
-            logger.error(f"❌ Erreur lecture fichier audio: {e}")
+            logger.error("❌ Erreur lecture audio: %s", e)
             return 0
 
     def close(self) -> None:
-        """Ferme le fichier"""
+        """Libère le buffer"""
         try:
-            self._file_h.close()
+            self._buf.close()
         except Exception as e:
-            logger.error(f"❌ Erreur fermeture fichier: {e}")
+            logger.error("❌ Erreur fermeture buffer audio: %s", e)
 
 class AudioManager:
     """
@@ -54,33 +109,83 @@ class AudioManager:
     - Text-to-Speech (synthèse vocale)
     """
     
+    # Synthétiseurs gardés ouverts : leur connexion au service est réutilisée d'un appel à l'autre
+    SYNTH_POOL_SIZE = min(32, (os.cpu_count() or 1) * 2)
+
     def __init__(self, settings: Settings):
         self.settings = settings
         self._speech_config = None
+        self._synth_pool = None
+        self._compressed_any_fmt = None
+        self._available = False
         self._init_speech_service()
     
     def _init_speech_service(self):
-        """Initialise la configuration Azure Speech Service"""
+        """Initialise la configuration Azure Speech Service (construite une fois par processus)"""
         try:
             if not self.settings.azure_speech_key:
                 logger.error("❌ AZURE_SPEECH_KEY manquante dans .env")
                 raise ValueError("Clé Azure Speech Service manquante")
             
-            self._speech_config = speechsdk.SpeechConfig(
-                subscription=self.settings.azure_speech_key,
-                region=self.settings.azure_speech_region
-            )
-            
-            # Configuration française
-            self._speech_config.speech_recognition_language = "fr-FR"
-            self._speech_config.speech_synthesis_language = "fr-FR"
-            self._speech_config.speech_synthesis_voice_name = "fr-FR-DeniseNeural"
-            
-            logger.info(f"✅ Azure Speech Service initialisé (région: {self.settings.azure_speech_region})")
+            key = (self.settings.azure_speech_key, self.settings.azure_speech_region)
+            with _SHARED_SPEECH_LOCK:
+                shared = _SHARED_SPEECH.get(key)
+                if shared is None:
+                    shared = (
+                        self._create_speech_config(),
+                        queue.LifoQueue(maxsize=self.SYNTH_POOL_SIZE),
+                        # Format d'entrée des clips compressés, construit une fois (objet natif du SDK)
+                        speechsdk.audio.AudioStreamFormat(compressed_stream_format=speechsdk.AudioStreamContainerFormat.ANY)
+                    )
+                    _SHARED_SPEECH[key] = shared
+                    logger.info("✅ Azure Speech Service initialisé (région: %s)", self.settings.azure_speech_region)
+            self._speech_config, self._synth_pool, self._compressed_any_fmt = shared
+            # La clé est validée ci-dessus : la disponibilité ne change plus pour cette instance
+            self._available = True
             
         except Exception as e:
-            logger.error(f"❌ Erreur initialisation Azure Speech: {e}")
+            logger.error("❌ Erreur initialisation Azure Speech: %s", e)
             raise
+
+    def _create_speech_config(self) -> speechsdk.SpeechConfig:
+        """Construit la configuration Azure Speech (français, sortie MP3)"""
+        speech_config = speechsdk.SpeechConfig(
+            subscription=self.settings.azure_speech_key,
+            region=self.settings.azure_speech_region
+        )
+        
+        # Configuration française
+        speech_config.speech_recognition_language = "fr-FR"
+        speech_config.speech_synthesis_language = "fr-FR"
+        speech_config.speech_synthesis_voice_name = "fr-FR-DeniseNeural"
+        
+        # Sortie MP3 48 kbit/s : 5 à 10x moins d'octets à rapatrier que le PCM par défaut
+        speech_config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Audio24Khz48KBitRateMonoMp3
+        )
+        return speech_config
+
+    @contextlib.contextmanager
+    def _acquire_synth(self) -> Iterator[speechsdk.SpeechSynthesizer]:
+        """
+        Prête un synthétiseur du pool (ou en crée un) le temps d'une synthèse
+        
+        Il n'est rendu au pool qu'après une synthèse menée à terme : sur exception
+        ou lecture abandonnée, il peut encore être en train de parler.
+        """
+        try:
+            synth = self._synth_pool.get_nowait()
+        except queue.Empty:
+            # Pas de sortie audio : les données restent accessibles via AudioDataStream
+            synth = speechsdk.SpeechSynthesizer(
+                speech_config=self._speech_config,
+                audio_config=None
+            )
+        yield synth
+        try:
+            self._synth_pool.put_nowait(synth)
+        except queue.Full:
+            pass
     
     def _detect_audio_format(self, audio_bytes: bytes) -> str:
         """
@@ -92,91 +197,78 @@ class AudioManager:
         Returns:
             Format détecté ('wav', 'mp3', 'm4a', 'ogg', 'webm') ou 'unknown'
         """
-        if len(audio_bytes) < 12:
+        # Une seule copie de l'en-tête, comparée à la table de signatures
+        header = audio_bytes[:20]
+        if len(header) < 12:
             return 'unknown'
             
-        # Vérifier les signatures de fichiers
-        if audio_bytes.startswith(b'RIFF') and b'WAVE' in audio_bytes[:12]:
-            return 'wav'
-        elif audio_bytes.startswith(b'ID3') or audio_bytes.startswith(b'\xff\xfb'):
-            return 'mp3'
-        elif b'ftyp' in audio_bytes[:12] and (b'M4A' in audio_bytes[:20] or b'mp41' in audio_bytes[:20]):
-            return 'm4a'
-        elif audio_bytes.startswith(b'OggS'):
-            return 'ogg'
-        elif audio_bytes.startswith(b'\x1a\x45\xdf\xa3'):
-            return 'webm'
-        else:
-            return 'unknown'
+        for audio_format, magics in AUDIO_SIGNATURES:
+            if all(header.startswith(magic, offset) for offset, magic in magics):
+                if audio_format == 'm4a' and not any(brand in header for brand in M4A_BRANDS):
+                    continue
+                return audio_format
+        return 'unknown'
             
-    def _create_temp_file_with_extension(self, audio_bytes: bytes) -> tuple[str, str]:
+    def _create_audio_input(self, audio_bytes: bytes, detected_format: str) -> tuple:
         """
-        Crée un fichier temporaire avec l'extension appropriée selon le format
+        Construit le stream d'entrée Azure directement depuis les bytes (sans fichier temporaire)
         
         Args:
             audio_bytes: Audio en format bytes
+            detected_format: Format détecté par _detect_audio_format
             
         Returns:
-            Tuple (chemin_fichier, format_détecté)
+            Tuple (audio_config, stream, callback)
         """
-        detected_format = self._detect_audio_format(audio_bytes)
-        
-        # Mapper les extensions
-        extension_map = {
-            'wav': '.wav',
-            'mp3': '.mp3', 
-            'm4a': '.m4a',
-            'ogg': '.ogg',
-            'webm': '.webm',
-            'unknown': '.wav'  # Par défaut
-        }
-        
-        extension = extension_map.get(detected_format, '.wav')
-        
-        # Créer le fichier temporaire
-        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as temp_file:
-            temp_file.write(audio_bytes)
-            temp_file_path = temp_file.name
+        # Configuration pour formats compressés (WebM, OGG, MP3, M4A) et WAV
+        if detected_format in ['webm', 'ogg', 'mp3', 'm4a']:
+            # Utiliser le support natif Azure Speech Service pour formats compressés
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("🔧 Configuration format compressé pour %s", detected_format.upper())
+            
+            # Azure Speech Service supporte nativement WebM/OGG via GStreamer
+            stream_format = self._compressed_any_fmt
+            callback = BytesReaderCallback(audio_bytes, COMPRESSED_BYTES_PER_SEC)
             
-        logger.info(f"📁 Fichier temporaire créé: {temp_file_path} (format: {detected_format})")
-        return temp_file_path, detected_format
+        else:
+            # WAV : le format PCM est lu dans l'en-tête, seules les frames sont envoyées
+            logger.info("🔧 Configuration standard pour WAV")
+            with wave.open(io.BytesIO(audio_bytes), "rb") as wav_file:
+                stream_format = speechsdk.audio.AudioStreamFormat(
+                    samples_per_second=wav_file.getframerate(),
+                    bits_per_sample=wav_file.getsampwidth() * 8,
+                    channels=wav_file.getnchannels()
+                )
+                pcm_frames = wav_file.readframes(wav_file.getnframes())
+                bytes_per_sec = wav_file.getframerate() * wav_file.getsampwidth() * wav_file.getnchannels()
+            callback = BytesReaderCallback(pcm_frames, bytes_per_sec)
+        
+        stream = speechsdk.audio.PullAudioInputStream(callback, stream_format)
+        audio_config = speechsdk.audio.AudioConfig(stream=stream)
+        return audio_config, stream, callback
 
-    def speech_to_text_from_bytes(self, audio_bytes: bytes) -> Optional[str]:
+    def speech_to_text_from_bytes(self, audio_bytes: bytes, mime_type: Optional[str] = None) -> Optional[str]:
         """
         Convertit un audio en bytes vers du texte
         
         Args:
             audio_bytes: Audio en format bytes
+            mime_type: Type MIME connu de l'appelant (ex. 'audio/webm'), évite la détection par en-tête
             
         Returns:
             Texte transcrit ou None si erreur
         """
         try:
-            # Créer un fichier temporaire avec l'extension appropriée
-            temp_file_path, detected_format = self._create_temp_file_with_extension(audio_bytes)
-            
-            try:
-                callback = None
-                stream = None
-                speech_recognizer = None
-                
-                # Configuration pour formats compressés (WebM, OGG, MP3, M4A) et WAV
-                if detected_format in ['webm', 'ogg', 'mp3', 'm4a']:
-                    # Utiliser le support natif Azure Speech Service pour formats compressés
-                    logger.info(f"🔧 Configuration format compressé pour {detected_format.upper()}")
-                    
-                    # Créer un format audio compressé - Azure Speech Service supporte nativement WebM/OGG via GStreamer
-                    compressed_format = speechsdk.audio.AudioStreamFormat(compressed_stream_format=speechsdk.AudioStreamContainerFormat.ANY)
-                    
-                    # Créer un stream d'entrée pour le format compressé
-                    callback = BinaryFileReaderCallback(temp_file_path)
-                    stream = speechsdk.audio.PullAudioInputStream(callback, compressed_format)
-                    audio_config = speechsdk.audio.AudioConfig(stream=stream)
-                    
-                else:
-                    # Configuration standard pour WAV
-                    logger.info("🔧 Configuration standard pour WAV")
-                    audio_config = speechsdk.audio.AudioConfig(filename=temp_file_path)
+            with contextlib.ExitStack() as stack:
+                detected_format = None
+                if mime_type:
+                    detected_format = MIME_FORMATS.get(mime_type.split(';', 1)[0].strip().lower())
+                if detected_format is None:
+                    detected_format = self._detect_audio_format(audio_bytes)
+                audio_config, stream, callback = self._create_audio_input(audio_bytes, detected_format)
+                # Tout est en mémoire : seules les ressources du SDK sont à libérer (stream puis callback)
+                stack.callback(callback.close)
+                stack.callback(stream.close)
                 
                 speech_recognizer = speechsdk.SpeechRecognizer(
                     speech_config=self._speech_config,
@@ -184,100 +276,200 @@ class AudioManager:
                 )
                 
                 # Reconnaissance vocale
-                logger.info(f"🎤 Début reconnaissance vocale ({detected_format})...")
+                logger.info("🎤 Début reconnaissance vocale (%s)...", detected_format)
                 result = speech_recognizer.recognize_once_async().get()
-                
-                # Fermer les ressources avant de traiter le résultat
-                if stream:
-                    stream.close()
-                if callback:
-                    callback.close()
-                if speech_recognizer:
-                    del speech_recognizer
-                
-                if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                    logger.info(f"✅ Texte reconnu: {result.text[:50]}...")
-                    return result.text.strip()
-                elif result.reason == speechsdk.ResultReason.NoMatch:
-                    logger.warning("⚠️ Aucun speech reconnu dans l'audio")
-                    return None
-                elif result.reason == speechsdk.ResultReason.Canceled:
+            
+            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
+                logger.info("✅ Texte reconnu: %.50s...", result.text)
+                return result.text.strip()
+            elif result.reason == speechsdk.ResultReason.NoMatch:
+                logger.warning("⚠️ Aucun speech reconnu dans l'audio")
+                return None
+            elif result.reason == speechsdk.ResultReason.Canceled:
+                # Les détails d'annulation sont un objet natif du SDK : lus seulement s'ils sont journalisés
+                if logger.isEnabledFor(logging.ERROR):
                     cancellation_details = result.cancellation_details
-                    logger.error(f"❌ Reconnaissance annulée: {cancellation_details.reason}")
+                    logger.error("❌ Reconnaissance annulée: %s", cancellation_details.reason)
                     if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                        logger.error(f"❌ Détails erreur: {cancellation_details.error_details}")
-                    return None
-                else:
-                    logger.error(f"❌ Erreur reconnaissance: {result.reason}")
-                    return None
-                    
-            finally:
-                # S'assurer que toutes les ressources sont fermées avant de supprimer le fichier
-                try:
-                    if 'stream' in locals() and stream:
-                        stream.close()
-                    if 'callback' in locals() and callback:
-                        callback.close()
-                    if 'speech_recognizer' in locals() and speech_recognizer:
-                        del speech_recognizer
-                except Exception as cleanup_error:
-                    logger.warning(f"⚠️ Erreur nettoyage ressources: {cleanup_error}")
+                        logger.error("❌ Détails erreur: %s", cancellation_details.error_details)
+                return None
+            else:
+                logger.error("❌ Erreur reconnaissance: %s", result.reason)
+                return None
                 
-                # Nettoyer le fichier temporaire avec retry pour les verrous de fichier
-                import time
-                for attempt in range(3):
-                    try:
-                        if os.path.exists(temp_file_path):
-                            os.unlink(temp_file_path)
-                        break
-                    except (OSError, PermissionError) as e:
-                        if attempt < 2:  # Retry pour les 2 premiers essais
-                            logger.warning(f"⚠️ Tentative {attempt+1} suppression fichier échouée: {e}")
-                            time.sleep(0.1)  # Attendre 100ms avant de retry
-                        else:
-                            logger.error(f"❌ Impossible de supprimer le fichier temporaire: {e}")
-                    
         except Exception as e:
-            logger.error(f"❌ Erreur speech-to-text: {e}")
+            logger.error("❌ Erreur speech-to-text: %s", e)
             return None
     
-    def text_to_speech(self, text: str) -> Optional[bytes]:
+    def text_to_speech_stream(self, text: str, chunk_size: int = 4096) -> Iterator[bytes]:
         """
-        Convertit du texte en audio (bytes)
+        Synthétise du texte en audio et produit les bytes au fil de l'eau
+        
+        Le premier morceau est disponible dès que le service commence à répondre,
+        sans attendre la fin de la synthèse.
         
         Args:
             text: Texte à synthétiser
+            chunk_size: Taille maximale de chaque morceau en octets
             
-        Returns:
-            Audio en bytes ou None si erreur
+        Yields:
+            Morceaux d'audio ; rien si le texte est vide ou en cas d'erreur. Une synthèse
+            annulée en cours de route s'arrête sur les morceaux déjà produits (erreur loguée)
         """
         try:
-            if not text or not text.strip():
-                logger.warning("⚠️ Texte vide pour TTS")
-                return None
-                
-            logger.info(f"🔊 Synthèse vocale: {text[:50]}...")
+            yield from self._synthesize_chunks(text, chunk_size)
+        except Exception as e:
+            logger.error("❌ Erreur text-to-speech: %s", e)
+    
+    def _synthesize_chunks(self, text: str, chunk_size: int = 4096) -> Iterator[bytes]:
+        """
+        Morceaux d'audio de la synthèse ; lève RuntimeError si elle est annulée en cours
+        de route, pour que les appelants qui assemblent l'audio écartent le résultat tronqué
+        """
+        if not text or not text.strip():
+            logger.warning("⚠️ Texte vide pour TTS")
+            return
             
-            # Configuration audio en mémoire
-            audio_config = speechsdk.audio.AudioOutputConfig(use_default_speaker=False)
-            speech_synthesizer = speechsdk.SpeechSynthesizer(
-                speech_config=self._speech_config,
-                audio_config=audio_config
-            )
+        logger.info("🔊 Synthèse vocale: %.50s...", text)
+        
+        with self._acquire_synth() as speech_synthesizer:
+            # Rend la main dès le début de la synthèse
+            result = speech_synthesizer.start_speaking_text_async(text).get()
+            if result.reason == speechsdk.ResultReason.Canceled:
+                if logger.isEnabledFor(logging.ERROR):
+                    logger.error("❌ Erreur synthèse: %s", result.cancellation_details)
+                return
             
-            # Synthèse vocale
-            result = speech_synthesizer.speak_text_async(text).get()
+            audio_stream = speechsdk.AudioDataStream(result)
+            while True:
+                # Le SDK écrit dans le buffer fourni : un buffer neuf par morceau,
+                # puisque le morceau précédent est encore entre les mains de l'appelant
+                buffer = bytes(chunk_size)
+                filled = audio_stream.read_data(buffer)
+                if filled <= 0:
+                    break
+                yield buffer if filled == chunk_size else buffer[:filled]
             
-            if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                logger.info("✅ Synthèse vocale réussie")
-                return result.audio_data
-            else:
-                logger.error(f"❌ Erreur synthèse: {result.cancellation_details}")
-                return None
-                
+            # Fin du flux : complète, ou annulée en cours de route (audio tronqué). L'exception
+            # traverse _acquire_synth, qui ne rend donc pas ce synthétiseur au pool
+            if audio_stream.status != speechsdk.StreamStatus.AllData:
+                details = audio_stream.cancellation_details
+                raise RuntimeError(
+                    f"synthèse interrompue ({details.reason}: {details.error_details})"
+                    if details is not None else f"synthèse interrompue (statut {audio_stream.status})"
+                )
+        logger.info("✅ Synthèse vocale réussie")
+    
+    def text_to_speech(self, text: str) -> Optional[bytes]:
+        """
+        Convertit du texte en audio (bytes)
+        
+        Args:
+            text: Texte à synthétiser
+            
+        Returns:
+            Audio MP3 en bytes ou None si erreur
+        """
+        try:
+            audio_bytes = b"".join(self._synthesize_chunks(text))
         except Exception as e:
-            logger.error(f"❌ Erreur text-to-speech: {e}")
+            logger.error("❌ Erreur text-to-speech: %s", e)
             return None
+        return audio_bytes or None
+    
+    def speech_to_text_many(self, audio_clips: Iterable[bytes], silence_seconds: float = 0.5) -> List[Optional[str]]:
+        """
+        Transcrit plusieurs clips sur une seule session de reconnaissance continue
+        
+        La connexion au service n'est ouverte qu'une fois pour tous les clips. Les clips
+        WAV de même format PCM sont poussés bout à bout, séparés par un silence, et chaque
+        phrase reconnue est rattachée à son clip d'après son offset. Sinon (formats
+        compressés ou PCM hétérogène), chaque clip est transcrit séparément.
+        
+        Args:
+            audio_clips: Clips audio en bytes
+            silence_seconds: Silence inséré entre deux clips pour clore la phrase en cours
+            
+        Returns:
+            Texte transcrit par clip (None si rien reconnu), dans l'ordre des clips
+        """
+        audio_clips = list(audio_clips)
+        if not audio_clips:
+            return []
+        
+        try:
+            pcm_clips = []
+            pcm_params = None
+            for clip in audio_clips:
+                if self._detect_audio_format(clip) != 'wav':
+                    raise ValueError("clip non WAV")
+                with wave.open(io.BytesIO(clip), "rb") as wav_file:
+                    params = (wav_file.getframerate(), wav_file.getsampwidth(), wav_file.getnchannels())
+                    if pcm_params not in (None, params):
+                        raise ValueError("formats PCM différents")
+                    pcm_params = params
+                    pcm_clips.append(wav_file.readframes(wav_file.getnframes()))
+        except (ValueError, wave.Error) as e:
+            logger.info("🔁 Transcription clip par clip (%s)", e)
+            return [self.speech_to_text_from_bytes(clip) for clip in audio_clips]
+        
+        rate, width, channels = pcm_params
+        bytes_per_sec = rate * width * channels
+        frame_size = width * channels
+        silence = bytes(int(bytes_per_sec * silence_seconds) // frame_size * frame_size)
+        
+        # Fin de chaque clip (silence compris) en ticks de 100 ns, l'unité des offsets du SDK
+        bounds = []
+        elapsed = 0
+        for frames in pcm_clips:
+            elapsed += len(frames) + len(silence)
+            bounds.append(elapsed * 10_000_000 // bytes_per_sec)
+        
+        texts = [[] for _ in pcm_clips]
+        done = threading.Event()
+        
+        def on_recognized(evt):
+            if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+                index = min(bisect.bisect_right(bounds, evt.result.offset), len(texts) - 1)
+                texts[index].append(evt.result.text.strip())
+        
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=rate,
+            bits_per_sample=width * 8,
+            channels=channels
+        )
+        push_stream = speechsdk.audio.PushAudioInputStream(stream_format)
+        speech_recognizer = speechsdk.SpeechRecognizer(
+            speech_config=self._speech_config,
+            audio_config=speechsdk.audio.AudioConfig(stream=push_stream)
+        )
+        speech_recognizer.recognized.connect(on_recognized)
+        speech_recognizer.session_stopped.connect(lambda evt: done.set())
+        speech_recognizer.canceled.connect(lambda evt: done.set())
+        
+        try:
+            logger.info("🎤 Reconnaissance continue de %d clips...", len(pcm_clips))
+            speech_recognizer.start_continuous_recognition_async().get()
+            for frames in pcm_clips:
+                push_stream.write(frames)
+                push_stream.write(silence)
+            # Fin du flux : le service termine la dernière phrase puis clôt la session
+            push_stream.close()
+            if not done.wait(timeout=elapsed / bytes_per_sec + 30):
+                logger.warning("⚠️ Reconnaissance continue non terminée dans le délai")
+            speech_recognizer.stop_continuous_recognition_async().get()
+        except Exception as e:
+            logger.error("❌ Erreur speech-to-text continu: %s", e)
+        
+        return [" ".join(parts) or None for parts in texts]
+    
+    async def speech_to_text_from_bytes_async(self, audio_bytes: bytes, mime_type: Optional[str] = None) -> Optional[str]:
+        """Variante async de speech_to_text_from_bytes : l'attente du SDK ne bloque pas la boucle d'événements"""
+        return await asyncio.to_thread(self.speech_to_text_from_bytes, audio_bytes, mime_type)
+    
+    async def text_to_speech_async(self, text: str) -> Optional[bytes]:
+        """Variante async de text_to_speech : l'attente du SDK ne bloque pas la boucle d'événements"""
+        return await asyncio.to_thread(self.text_to_speech, text)
     
     def text_to_speech_base64(self, text: str) -> Optional[str]:
         """
@@ -288,25 +480,38 @@ class AudioManager:
             
         Returns:
             Audio encodé en base64 ou None si erreur
+        
+        Note: st.audio accepte directement les bytes de text_to_speech, sans base64.
         """
-        audio_bytes = self.text_to_speech(text)
-        if audio_bytes:
-            return base64.b64encode(audio_bytes).decode('utf-8')
-        return None
+        # Encodage au fil de la synthèse, par blocs multiples de 3 octets
+        # (pas de padding intermédiaire) ; le reste est reporté au morceau suivant
+        encoded_parts = []
+        pending = b""
+        try:
+            for chunk in self._synthesize_chunks(text):
+                if pending:
+                    chunk = pending + chunk
+                aligned = len(chunk) - len(chunk) % 3
+                encoded_parts.append(base64.b64encode(memoryview(chunk)[:aligned]))
+                pending = chunk[aligned:]
+        except Exception as e:
+            logger.error("❌ Erreur text-to-speech: %s", e)
+            return None
+        if pending:
+            encoded_parts.append(base64.b64encode(pending))
+        if not encoded_parts:
+            return None
+        return b"".join(encoded_parts).decode('ascii')
     
     def is_available(self) -> bool:
         """Vérifie si le service Azure Speech est disponible"""
-        return (
-            self._speech_config is not None and 
-            self.settings.azure_speech_key is not None
-        )
+        return self._available
     
     def get_status(self) -> dict:
         """Retourne le statut du service audio"""
         return {
-            "azure_speech_available": self.is_available(),
-            "speech_key_configured": bool(self.settings.azure_speech_key),
-            "region": self.settings.azure_speech_region,
-            "recognition_language": "fr-FR",
-            "synthesis_voice": "fr-FR-DeniseNeural"
+            **_STATUS_TMPL,
+            "azure_speech_available": self._available,
+            "speech_key_configured": self._available,
+            "region": self.settings.azure_speech_region
         }
\ No newline at end of file
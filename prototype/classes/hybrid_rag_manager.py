@@ -1,19 +1,48 @@
+import base64
+import functools
 import os
 import json
+import logging
+import re
+import time
+import uuid
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import chromadb
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.messages import HumanMessage
 
 from classes.image_store_manager import ImageStoreManager
+from classes.log_config import configure_logger
+
+logger = logging.getLogger(__name__)
+
+# Bloc markdown ```json ... ``` (ou ``` ... ```) autour de la réponse JSON du modèle vision
+_FENCE_RE = re.compile(r"^```(?:json)?\s*\n?(.*?)\n?```\s*$", re.DOTALL)
 
 
 class HybridRAGManager:
     """RAG Hybride : métadonnées en ChromaDB + images directes à l'agent"""
     
+    # Tentatives d'appel vision (erreurs transitoires : 429, timeout) et délai initial du backoff exponentiel
+    VISION_MAX_ATTEMPTS = 3
+    VISION_RETRY_BASE_SECONDS = 1.0
+    # Embeddings de requêtes gardés en mémoire (questions répétées dans la conversation)
+    QUERY_EMBEDDING_CACHE_SIZE = 512
+    
+    # Champs de métadonnées repris dans le texte indexé, avec leur libellé
+    _SEARCHABLE_FIELDS = (("game_elements", "Éléments"), ("key_concepts", "Concepts"), ("game_actions", "Actions"))
+    
     def __init__(self, settings, game_name=None):
         print("🚀 RAG Hybride: Initialisation")
         self.settings = settings
+        # Le paramètre debug pilote les logs détaillés d'indexation et de recherche
+        configure_logger(logger, settings.params.get("debug", False))
         self.game_name = game_name or "default"
+        # Filtre de recherche ChromaDB, fixe pour la durée de vie du gestionnaire
+        self._chroma_filter = {"$and": [{"source": {"$eq": "hybrid_rag"}}, {"game": {"$eq": self.game_name}}]}
         
         # Configuration embeddings - utiliser celui des settings hybride s'il existe
         if hasattr(settings, 'hybrid_embedding_model') and settings.hybrid_embedding_model:
@@ -21,7 +50,7 @@ class HybridRAGManager:
                 self.embeddings = settings.hybrid_embedding_model
                 print("✅ RAG Hybride: Utilisation du modèle d'embedding hybride depuis settings")
             except Exception as e:
-                print(f"⚠️ RAG Hybride: Erreur modèle embedding settings: {e}")
+                logger.warning("⚠️ RAG Hybride: Erreur modèle embedding settings: %s", e)
                 self.embeddings = None
         else:
             # Fallback vers configuration environnement
@@ -37,30 +66,47 @@ class HybridRAGManager:
                     )
                     print("✅ RAG Hybride: Embeddings Azure configurés (fallback)")
                 except Exception as e:
-                    print(f"⚠️ RAG Hybride: Erreur embeddings: {e}")
+                    logger.warning("⚠️ RAG Hybride: Erreur embeddings: %s", e)
                     self.embeddings = None
             else:
-                print("⚠️ RAG Hybride: Pas de déploiement embeddings configuré")
+                logger.warning("⚠️ RAG Hybride: Pas de déploiement embeddings configuré")
                 self.embeddings = None
         
-        # Configuration ChromaDB pour métadonnées (collection séparée)
+        # Configuration ChromaDB pour métadonnées (collection séparée) : serveur Chroma si chroma_host
+        # est configuré (écritures hors du processus Streamlit), sinon base locale persistante
         persist_dir = settings.params.get("chroma_persist_directory", "./chroma_db")
+        chroma_host = settings.params.get("chroma_host")
         
         if self.embeddings:
             try:
                 collection_name = f"hybrid_metadata_{self.game_name}"
-                self.vector_store = Chroma(
-                    collection_name=collection_name,
-                    persist_directory=persist_dir,
-                    embedding_function=self.embeddings
-                )
-                print(f"✅ RAG Hybride: ChromaDB configuré pour métadonnées ({persist_dir}/{collection_name})")
+                if chroma_host:
+                    chroma_port = settings.params.get("chroma_port", 8000)
+                    self.vector_store = Chroma(
+                        collection_name=collection_name,
+                        client=chromadb.HttpClient(host=chroma_host, port=chroma_port),
+                        embedding_function=self.embeddings
+                    )
+                    store_location = f"{chroma_host}:{chroma_port}"
+                else:
+                    self.vector_store = Chroma(
+                        collection_name=collection_name,
+                        persist_directory=persist_dir,
+                        embedding_function=self.embeddings
+                    )
+                    store_location = persist_dir
+                print(f"✅ RAG Hybride: ChromaDB configuré pour métadonnées ({store_location}/{collection_name})")
             except Exception as e:
-                print(f"⚠️ RAG Hybride: Erreur ChromaDB: {e}")
+                logger.warning("⚠️ RAG Hybride: Erreur ChromaDB: %s", e)
                 self.vector_store = None
         else:
             self.vector_store = None
         
+        # Cache LRU par instance des embeddings de requêtes
+        self._cached_query_embedding = None
+        if self.embeddings:
+            self._cached_query_embedding = functools.lru_cache(maxsize=self.QUERY_EMBEDDING_CACHE_SIZE)(self._compute_query_embedding)
+        
         # Gestionnaire d'images avec nom du jeu
         self.image_store = ImageStoreManager(game_name=self.game_name)
         
@@ -69,8 +115,8 @@ class HybridRAGManager:
         # Utiliser l'agent principal pour toutes les méthodes
         self.agent_model = settings.agent_model
         
-        # Fallback simulation
-        self.analyzed_documents = []
+        # Fallback simulation (historique borné : les plus anciennes entrées sont évincées)
+        self.analyzed_documents = deque(maxlen=settings.params.get("sim_history_max", 10000))
     
     def process_game_document(self, images_data):
         """Traite un document : analyse vision + stockage hybride"""
@@ -79,17 +125,22 @@ class HybridRAGManager:
         
         print(f"🔄 RAG Hybride: Traitement de {len(images_data)} images")
         
-        # 1. Analyser chaque image et stocker
+        # 1. Analyser les images en parallèle (appels vision bornés), puis stocker dans l'ordre d'origine
+        concurrency = max(1, min(self.settings.params.get("vision_concurrency", 10), len(images_data)))
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            analyses = list(executor.map(self._analyze_page, images_data))
+        
         stored_image_ids = []
-        for img in images_data:
-            # Analyse vision pour métadonnées (réutilise code existant)
-            page_analysis, vision_tokens = self._analyze_page(img)
+        for img, (page_analysis, vision_tokens) in zip(images_data, analyses):
             total_vision_tokens += vision_tokens
             
             # Stocker image + métadonnées localement
             if isinstance(page_analysis, str):
+                # Réponse éventuellement entourée d'un bloc markdown : les champs structurés sont
+                # stockés tels quels avec l'image, la recherche les relit depuis l'ImageStore
+                fence = _FENCE_RE.match(page_analysis)
                 try:
-                    metadata = json.loads(page_analysis)
+                    metadata = json.loads(fence.group(1) if fence else page_analysis)
                 except:
                     metadata = {"raw_analysis": page_analysis}
             else:
@@ -122,21 +173,29 @@ class HybridRAGManager:
         if self.vision_model:
             try:
                 prompt = self.settings.hybrid_vision_prompt
+                
+                # 'data' en base64 ou en octets bruts : les octets ne sont encodés qu'ici, juste avant l'appel
+                encoded_data = image_data['data']
+                if isinstance(encoded_data, bytes):
+                    image_size_bytes = len(encoded_data)
+                    encoded_data = base64.b64encode(encoded_data).decode("ascii")
+                else:
+                    image_size_bytes = len(encoded_data) * 3 // 4
 
                 message = HumanMessage(content=[
                     {"type": "text", "text": prompt},
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{image_data['data']}"}
+                        "image_url": {"url": f"data:image/jpeg;base64,{encoded_data}"}
                     }
                 ])
                 
                 # Estimation tokens
                 prompt_tokens = len(prompt) // 4
-                image_tokens = self._estimate_image_tokens(image_data['data'])
+                image_tokens = self._estimate_image_tokens(image_size_bytes)
                 estimated_input_tokens = prompt_tokens + image_tokens
                 
-                response = self.vision_model.invoke([message])
+                response = self._invoke_vision(message)
                 
                 output_tokens = len(response.content) // 4
                 total_vision_tokens = estimated_input_tokens + output_tokens
@@ -147,7 +206,7 @@ class HybridRAGManager:
                 return response.content, total_vision_tokens
                 
             except Exception as e:
-                print(f"❌ RAG Hybride: Erreur analyse vision: {e}")
+                logger.error("❌ RAG Hybride: Erreur analyse vision: %s", e)
                 # Fallback simulation
                 pass
         
@@ -161,19 +220,25 @@ class HybridRAGManager:
             "searchable_text": f"Métadonnées simulées pour {image_data.get('name', 'image')}"
         }
         
-        print(f"⚠️ RAG Hybride: Métadonnées simulées")
+        logger.warning("⚠️ RAG Hybride: Métadonnées simulées")
         return simulated_metadata, 0
     
-    def _estimate_image_tokens(self, base64_data):
-        """Estimation tokens image (réutilise logique existante)"""
-        image_size_bytes = len(base64_data) * 3 // 4
-        
-        if image_size_bytes < 50000:
-            return 85
-        elif image_size_bytes < 200000:
-            return 170
-        else:
-            return 255
+    def _invoke_vision(self, message):
+        """Appel vision avec reprise et backoff exponentiel sur les erreurs transitoires"""
+        for attempt in range(self.VISION_MAX_ATTEMPTS):
+            try:
+                return self.vision_model.invoke([message])
+            except Exception as e:
+                if attempt == self.VISION_MAX_ATTEMPTS - 1:
+                    raise
+                delay = self.VISION_RETRY_BASE_SECONDS * 2 ** attempt
+                logger.warning("⚠️ RAG Hybride: Appel vision échoué (%s), nouvel essai dans %.0fs", e, delay)
+                time.sleep(delay)
+    
+    @staticmethod
+    def _estimate_image_tokens(image_size_bytes):
+        """Estimation tokens image (réutilise logique existante) à partir de la taille en octets"""
+        return 85 if image_size_bytes < 50000 else 170 if image_size_bytes < 200000 else 255
     
     def _store_metadata_in_vector_db(self, image_ids):
         """Stocke les métadonnées dans ChromaDB avec références aux images"""
@@ -183,20 +248,25 @@ class HybridRAGManager:
             try:
                 documents = []
                 metadatas = []
+                # Position de chaque texte déjà retenu : une image au texte identique n'est pas réindexée
+                document_index = {}
+                duplicate_image_ids = {}
+                
+                # Récupérer en une fois les métadonnées de toutes les images
+                image_by_id = {img['image_id']: img for img in self.image_store.get_images_by_ids(image_ids)}
                 
                 for image_id in image_ids:
-                    # Récupérer métadonnées de l'image
-                    image_data = self.image_store.get_image(image_id)
+                    image_data = image_by_id.get(image_id)
                     if not image_data:
                         continue
                     
                     metadata = image_data['metadata']
                     
-                    # DEBUG: Examiner les métadonnées brutes
-                    print(f"🔍 METADATA DEBUG: Keys = {list(metadata.keys())}")
-                    if isinstance(metadata, dict):
+                    # DEBUG: Examiner les métadonnées brutes (boucle entière sautée hors debug)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("🔍 METADATA DEBUG: Keys = %s", list(metadata.keys()))
                         for key, value in metadata.items():
-                            print(f"   {key}: {type(value)} = '{str(value)[:100]}...'")
+                            logger.debug("   %s: %s = '%.100s...'", key, type(value), value)
                     
                     # Créer texte searchable à partir des métadonnées
                     searchable_parts = []
@@ -206,97 +276,62 @@ class HybridRAGManager:
                         raw_text = metadata['raw_analysis']
                         
                         # Nettoyer le JSON des blocs markdown
-                        if raw_text.startswith('```json'):
-                            # Supprimer ```json au début et ``` à la fin
-                            json_start = raw_text.find('\n') + 1
-                            json_end = raw_text.rfind('\n```')
-                            if json_end == -1:
-                                json_end = raw_text.rfind('```')
-                            if json_end != -1:
-                                clean_json = raw_text[json_start:json_end].strip()
-                            else:
-                                clean_json = raw_text[json_start:].strip()
-                        elif raw_text.startswith('```'):
-                            # Format ```\n{json}\n```
-                            json_start = raw_text.find('\n') + 1
-                            json_end = raw_text.rfind('\n```')
-                            if json_end == -1:
-                                json_end = raw_text.rfind('```')
-                            if json_end != -1:
-                                clean_json = raw_text[json_start:json_end].strip()
-                            else:
-                                clean_json = raw_text[json_start:].strip()
-                        else:
-                            clean_json = raw_text.strip()
+                        fence = _FENCE_RE.match(raw_text)
+                        clean_json = (fence.group(1) if fence else raw_text).strip()
                         
-                        print(f"🧹 JSON nettoyé ({len(clean_json)} chars): '{clean_json[:80]}...'")
+                        logger.debug("🧹 JSON nettoyé (%d chars): '%.80s...'", len(clean_json), clean_json)
                         
                         # Essayer de parser le JSON nettoyé
                         try:
-                            import json
                             parsed_metadata = json.loads(clean_json)
-                            print(f"🔧 JSON parsé avec succès: {list(parsed_metadata.keys())}")
+                            logger.debug("🔧 JSON parsé avec succès: %s", list(parsed_metadata))
                             # Remplacer metadata par les données parsées
                             metadata.update(parsed_metadata)
                         except json.JSONDecodeError as e:
-                            print(f"❌ Erreur parsing JSON nettoyé: {e}")
-                            print(f"   Contenu JSON: '{clean_json[:200]}...'")
+                            logger.warning("❌ Erreur parsing JSON nettoyé: %s", e)
+                            logger.debug("   Contenu JSON: '%.200s...'", clean_json)
                             # Fallback : utiliser le texte brut
                             metadata['searchable_text'] = clean_json
                     
                     if 'searchable_text' in metadata:
                         searchable_parts.append(str(metadata['searchable_text']))
                     
-                    if 'game_elements' in metadata and metadata['game_elements']:
-                        elements = metadata['game_elements']
-                        if isinstance(elements, list):
-                            searchable_parts.append("Éléments: " + ", ".join(elements))
-                        elif isinstance(elements, str):
-                            searchable_parts.append("Éléments: " + elements)
-                    
-                    if 'key_concepts' in metadata and metadata['key_concepts']:
-                        concepts = metadata['key_concepts']
-                        if isinstance(concepts, list):
-                            searchable_parts.append("Concepts: " + ", ".join(concepts))
-                        elif isinstance(concepts, str):
-                            searchable_parts.append("Concepts: " + concepts)
+                    for key, label in self._SEARCHABLE_FIELDS:
+                        value = self._join_field(metadata.get(key))
+                        if value:
+                            searchable_parts.append(f"{label}: {value}")
                     
-                    if 'game_actions' in metadata and metadata['game_actions']:
-                        actions = metadata['game_actions']
-                        if isinstance(actions, list):
-                            searchable_parts.append("Actions: " + ", ".join(actions))
-                        elif isinstance(actions, str):
-                            searchable_parts.append("Actions: " + actions)
-                    
-                    if 'sections' in metadata and metadata['sections']:
-                        sections = metadata['sections']
-                        if isinstance(sections, list):
-                            for section in sections:
-                                if isinstance(section, dict) and 'keywords' in section and section['keywords']:
-                                    keywords = section['keywords']
-                                    if isinstance(keywords, list):
-                                        searchable_parts.append("Section: " + ", ".join(keywords))
-                                    elif isinstance(keywords, str):
-                                        searchable_parts.append("Section: " + keywords)
+                    sections = metadata.get('sections')
+                    if isinstance(sections, list):
+                        searchable_parts.extend(
+                            f"Section: {keywords}"
+                            for keywords in (self._join_field(section.get('keywords')) for section in sections if isinstance(section, dict))
+                            if keywords
+                        )
                     
                     searchable_text = " | ".join(searchable_parts)
                     
                     # DEBUG: Logs détaillés pendant l'indexation
-                    print(f"🔍 INDEXATION: Image {image_id}")
-                    print(f"   📝 Texte searchable ({len(searchable_text)} chars): '{searchable_text[:120]}...'")
-                    print(f"   📁 Original: {image_data.get('original_name', 'N/A')}")
-                    if 'searchable_text' in metadata:
-                        print(f"   🎯 Searchable direct: '{metadata['searchable_text'][:80]}...'")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("🔍 INDEXATION: Image %s", image_id)
+                        logger.debug("   📝 Texte searchable (%d chars): '%.120s...'", len(searchable_text), searchable_text)
+                        logger.debug("   📁 Original: %s", image_data.get('original_name', 'N/A'))
+                        if 'searchable_text' in metadata:
+                            logger.debug("   🎯 Searchable direct: '%.80s...'", metadata['searchable_text'])
                     
+                    index = document_index.get(searchable_text)
+                    if index is not None:
+                        duplicate_image_ids.setdefault(index, []).append(image_id)
+                        continue
+                    document_index[searchable_text] = len(documents)
                     documents.append(searchable_text)
                     
-                    # Métadonnées pour ChromaDB (avec référence image)
+                    # Métadonnées pour ChromaDB : références seulement, les champs structurés restent dans l'ImageStore
                     chroma_metadata = {
                         "image_id": image_id,
                         "image_path": image_data['image_path'],
                         "source": "hybrid_rag",
-                        "game": self.game_name,
-                        **{k: str(v) for k, v in metadata.items() if k not in ['image_id', 'image_path', 'stored_at']}
+                        "game": self.game_name
                     }
                     metadatas.append(chroma_metadata)
                 
@@ -304,21 +339,18 @@ class HybridRAGManager:
                 total_chars = sum(len(doc) for doc in documents)
                 estimated_embedding_tokens = total_chars // 4
                 
-                # DEBUG: Vérification unicité avant stockage
-                unique_docs = set(documents)
-                print(f"🔍 INDEXATION FINAL: {len(documents)} documents, {len(unique_docs)} uniques")
-                if len(unique_docs) < len(documents):
-                    print(f"⚠️ PROBLÈME: {len(documents) - len(unique_docs)} documents dupliqués détectés !")
-                    for i, doc in enumerate(documents):
-                        print(f"   Doc {i+1}: '{doc[:60]}...'")
-                else:
-                    print("✅ Tous les documents à indexer sont uniques")
+                # Images au texte identique rattachées au document indexé
+                for index, duplicate_ids in duplicate_image_ids.items():
+                    metadatas[index]["additional_image_ids"] = json.dumps(duplicate_ids)
+                if duplicate_image_ids:
+                    logger.warning(
+                        "⚠️ RAG Hybride: %d documents dupliqués non réindexés",
+                        sum(len(ids) for ids in duplicate_image_ids.values())
+                    )
+                logger.debug("🔍 INDEXATION FINAL: %d documents uniques", len(documents))
                 
-                # Ajouter au vector store
-                self.vector_store.add_texts(
-                    texts=documents,
-                    metadatas=metadatas
-                )
+                # Ajouter au vector store, par lots
+                self._add_documents_in_batches(documents, metadatas)
                 
                 print(f"✅ RAG Hybride: {len(documents)} métadonnées vectorisées")
                 print(f"💰 Embeddings tokens: ≈{estimated_embedding_tokens}")
@@ -326,145 +358,83 @@ class HybridRAGManager:
                 return estimated_embedding_tokens
                 
             except Exception as e:
-                print(f"❌ RAG Hybride: Erreur vectorisation: {e}")
+                logger.error("❌ RAG Hybride: Erreur vectorisation: %s", e)
                 self._store_simulation(image_ids)
                 return 0
         else:
             self._store_simulation(image_ids)
             return 0
     
+    @staticmethod
+    def _join_field(value):
+        """Texte d'un champ de métadonnées : liste jointe par des virgules, chaîne telle quelle, sinon None"""
+        if isinstance(value, list):
+            return ", ".join(value)
+        if isinstance(value, str):
+            return value
+        return None
+    
+    def _add_documents_in_batches(self, documents, metadatas):
+        """Vectorise et insère les documents par lots : l'embedding du lot suivant chevauche l'écriture du lot courant"""
+        batch_size = self.settings.params.get("chroma_batch_size", 256)
+        batches = [
+            (documents[i:i + batch_size], metadatas[i:i + batch_size])
+            for i in range(0, len(documents), batch_size)
+        ]
+        if not batches:
+            return
+        
+        # Embeddings calculés hors de Chroma (une requête par lot) puis écrits directement dans la collection
+        collection = self.vector_store._collection
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self.embeddings.embed_documents, batches[0][0])
+            for i, (texts, batch_metadatas) in enumerate(batches):
+                embeddings = pending.result()
+                if i + 1 < len(batches):
+                    pending = executor.submit(self.embeddings.embed_documents, batches[i + 1][0])
+                collection.upsert(
+                    ids=[str(uuid.uuid4()) for _ in texts],
+                    embeddings=embeddings,
+                    metadatas=batch_metadatas,
+                    documents=texts
+                )
+    
     def retrieve_relevant_images(self, user_query, k=3):
         """Recherche images pertinentes et retourne images directes + contexte"""
         print(f"🔎 RAG Hybride: Recherche pour '{user_query[:50]}...'")
-        print(f"🔍 DEBUG: Query complète = '{user_query}'")
         
         if self.embeddings and self.vector_store:
             try:
-                # Vérifier le nombre total de documents dans la collection
-                collection_count = self.vector_store._collection.count()
-                print(f"🔍 DEBUG: Collection contient {collection_count} documents au total")
+                # Embedding de la requête calculé une fois (et mis en cache), puis recherche par vecteur
+                query_embedding = self._embed_query(user_query)
                 
-                # SOLUTION CACHE: Forcer la recréation du vector store pour contourner le cache LangChain
-                print("🔧 DEBUG: Force refresh du vector store pour éviter le cache")
-                persist_dir = self.settings.params.get("chroma_persist_directory", "./chroma_db")
+                # Diagnostics (embedding, contenu de la collection) : debug uniquement
+                if logger.isEnabledFor(logging.DEBUG):
+                    self._log_retrieval_diagnostics(user_query, query_embedding)
                 
-                # Recréer le vector store avec les mêmes paramètres pour éviter le cache
-                collection_name = f"hybrid_metadata_{self.game_name}"
-                fresh_vector_store = Chroma(
-                    collection_name=collection_name,
-                    persist_directory=persist_dir,
-                    embedding_function=self.embeddings
-                )
-                
-                # DIAGNOSTIC: Vérifier l'embedding de la query
-                print(f"🔍 DEBUG: Test embedding de la query")
-                try:
-                    query_embedding = self.embeddings.embed_query(user_query)
-                    print(f"🔍 DEBUG: Query embedding généré: {len(query_embedding)} dimensions, début: {query_embedding[:3]}")
-                except Exception as e:
-                    print(f"❌ DEBUG: Erreur génération query embedding: {e}")
-                
-                # DIAGNOSTIC: Vérifier le contenu de la collection
-                print(f"🔍 DEBUG: Vérification contenu collection")
-                try:
-                    collection = fresh_vector_store._collection
-                    all_docs = collection.get(limit=10)  # Récupérer plus de docs
-                    print(f"🔍 DEBUG: Collection a {len(all_docs['ids'])} documents")
-                    
-                    # Vérifier si tous les textes sont identiques
-                    unique_texts = set()
-                    for i, (doc_id, doc_text, metadata) in enumerate(zip(all_docs['ids'][:5], all_docs['documents'][:5], all_docs['metadatas'][:5])):
-                        print(f"🔍 DEBUG: Doc {i+1}: ID={doc_id}")
-                        print(f"   📝 Texte ({len(doc_text)} chars): '{doc_text[:100]}...'")
-                        print(f"   🏷️ Image ID: {metadata.get('image_id', 'N/A')}")
-                        unique_texts.add(doc_text)
-                    
-                    print(f"🔍 DEBUG: Nombre de textes uniques: {len(unique_texts)} / {len(all_docs['documents'][:5])}")
-                    
-                    if len(unique_texts) == 1:
-                        print("❌ PROBLÈME IDENTIFIÉ: Tous les documents ont le même contenu textuel !")
-                        print(f"   📝 Contenu répété: '{list(unique_texts)[0][:150]}...'")
-                    elif len(unique_texts) < len(all_docs['documents'][:5]):
-                        print(f"⚠️ PROBLÈME PARTIEL: Seulement {len(unique_texts)} textes uniques sur {len(all_docs['documents'][:5])}")
-                    else:
-                        print("✅ Les documents ont des contenus différents")
-                        
-                except Exception as e:
-                    print(f"❌ DEBUG: Erreur lecture collection: {e}")
-                
-                # Test SANS filtre d'abord pour voir si c'est le filtre qui pose problème
-                print(f"🔍 DEBUG: Test similarity search SANS filtre")
-                similar_chunks_no_filter = fresh_vector_store.similarity_search_with_score(
-                    user_query,
-                    k=k
-                )
-                print(f"🔍 DEBUG: Sans filtre: {len(similar_chunks_no_filter) if similar_chunks_no_filter else 0} chunks")
-                if similar_chunks_no_filter:
-                    for i, (chunk, score) in enumerate(similar_chunks_no_filter[:3], 1):
-                        print(f"🔍 DEBUG: Sans filtre Chunk {i} - Score: {score:.4f} - Source: {chunk.metadata.get('source', 'N/A')}")
-                
-                # Recherche par similarité dans les métadonnées avec scores sur le store fraîchement créé
-                print(f"🔍 DEBUG: Appel similarity_search_with_score avec k={k} sur fresh store AVEC filtre")
-                similar_chunks_with_scores = fresh_vector_store.similarity_search_with_score(
-                    user_query,
+                # Recherche par similarité dans les métadonnées avec scores
+                logger.debug("🔍 DEBUG: Appel similarity_search_by_vector_with_relevance_scores avec k=%d", k)
+                similar_chunks_with_scores = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                    query_embedding.tolist(),
                     k=k,  # Nombre d'images à récupérer
-                    filter={"$and": [{"source": {"$eq": "hybrid_rag"}}, {"game": {"$eq": self.game_name}}]}
+                    filter=self._chroma_filter
                 )
-                print(f"🔍 DEBUG: similarity_search_with_score retourné {len(similar_chunks_with_scores) if similar_chunks_with_scores else 0} chunks")
+                logger.debug("🔍 DEBUG: similarity_search_with_score retourné %d chunks", len(similar_chunks_with_scores or ()))
                 
                 # Extraire les chunks et afficher les scores
                 similar_chunks = []
                 if similar_chunks_with_scores:
                     for i, (chunk, score) in enumerate(similar_chunks_with_scores, 1):
                         similar_chunks.append(chunk)
-                        print(f"🔍 DEBUG: Chunk {i} - Score: {score:.4f} - ID: {chunk.metadata.get('image_id', 'inconnu')}")
+                        logger.debug("🔍 DEBUG: Chunk %d - Score: %.4f - ID: %s", i, score, chunk.metadata.get('image_id', 'inconnu'))
                 
                 if similar_chunks:
-                    # Extraire les image_ids des résultats
-                    image_ids = [chunk.metadata.get('image_id') for chunk in similar_chunks if 'image_id' in chunk.metadata]
+                    # Extraire les image_ids des résultats, y compris les images au texte identique
+                    image_ids = [image_id for chunk in similar_chunks for image_id in self._chunk_image_ids(chunk.metadata)]
                     
                     # Logs détaillés des images trouvées
                     print(f"✅ RAG Hybride: {len(similar_chunks)} métadonnées trouvées")
-                    for i, chunk in enumerate(similar_chunks, 1):
-                        metadata = chunk.metadata
-                        image_id = metadata.get('image_id', 'inconnu')
-                        
-                        log_info = f"🖼️ Image {i}: {image_id}"
-                        if 'image_path' in metadata:
-                            filename = os.path.basename(metadata['image_path'])
-                            log_info += f" ({filename})"
-                        
-                        print(log_info)
-                        
-                        # Afficher les éléments de jeu détectés
-                        if 'game_elements' in metadata:
-                            elements_str = metadata['game_elements']
-                            if isinstance(elements_str, str) and elements_str.startswith('['):
-                                try:
-                                    import ast
-                                    elements = ast.literal_eval(elements_str)
-                                    print(f"   🎮 Éléments: {', '.join(elements[:5])}{'...' if len(elements) > 5 else ''}")
-                                except:
-                                    print(f"   🎮 Éléments: {elements_str[:50]}...")
-                            else:
-                                print(f"   🎮 Éléments: {str(elements_str)[:50]}...")
-                        
-                        # Afficher les concepts clés
-                        if 'key_concepts' in metadata:
-                            concepts_str = metadata['key_concepts']
-                            if isinstance(concepts_str, str) and concepts_str.startswith('['):
-                                try:
-                                    import ast
-                                    concepts = ast.literal_eval(concepts_str)
-                                    print(f"   💡 Concepts: {', '.join(concepts[:5])}{'...' if len(concepts) > 5 else ''}")
-                                except:
-                                    print(f"   💡 Concepts: {concepts_str[:50]}...")
-                            else:
-                                print(f"   💡 Concepts: {str(concepts_str)[:50]}...")
-                        
-                        # Aperçu du texte de recherche
-                        searchable_preview = chunk.page_content[:80] + "..." if len(chunk.page_content) > 80 else chunk.page_content
-                        print(f"   💬 Contexte: {searchable_preview}")
+                    self._log_found_chunks(similar_chunks)
                     
                     # Récupérer les images complètes
                     images = self.image_store.get_images_by_ids(image_ids)
@@ -472,10 +442,7 @@ class HybridRAGManager:
                     # Logs des images effectivement récupérées
                     if images:
                         print(f"📷 RAG Hybride: {len(images)} images chargées pour l'agent")
-                        for i, img in enumerate(images, 1):
-                            original_name = img['metadata'].get('original_name', 'inconnu')
-                            image_size = len(img['image_data']) // 1024  # Taille approximative en KB
-                            print(f"   📄 Image {i}: {original_name} (~{image_size}KB)")
+                        self._log_loaded_images(images)
                     
                     # Formater le contexte hybride
                     context = self._format_hybrid_context(images, similar_chunks)
@@ -486,40 +453,138 @@ class HybridRAGManager:
                         "image_count": len(images)
                     }
                 else:
-                    print("⚠️ RAG Hybride: Aucune image pertinente trouvée")
+                    logger.warning("⚠️ RAG Hybride: Aucune image pertinente trouvée")
                     return None
                     
             except Exception as e:
-                print(f"❌ RAG Hybride: Erreur recherche: {e}")
+                logger.error("❌ RAG Hybride: Erreur recherche: %s", e)
                 return None
         else:
-            print("⚠️ RAG Hybride: Composants non configurés")
+            logger.warning("⚠️ RAG Hybride: Composants non configurés")
             return {"context": f"[Simulation hybride pour: {user_query[:30]}...]", "images": [], "image_count": 0}
     
-    def _format_hybrid_context(self, images, chunks):
-        """Formate le contexte hybride (métadonnées + références images)"""
-        if not images or not chunks:
-            return None
+    def _embed_query(self, user_query):
+        """Embedding de la requête, mis en cache sur le texte normalisé (espaces superflus retirés)"""
+        return self._cached_query_embedding(" ".join(user_query.split()))
+    
+    def _compute_query_embedding(self, query):
+        """Embedding stocké en float32 contigus (4 octets par composante au lieu d'un objet float Python)"""
+        return array('f', self.embeddings.embed_query(query))
+    
+    def _log_retrieval_diagnostics(self, user_query, query_embedding):
+        """Diagnostics de recherche (appels supplémentaires au service d'embedding et à ChromaDB)"""
+        logger.debug("🔍 DEBUG: Query complète = '%s'", user_query)
+        
+        # Le store est réutilisé : LangChain ne met pas les requêtes en cache, chaque recherche
+        # interroge la collection persistée, qui voit donc les documents ajoutés depuis
+        collection = self.vector_store._collection
+        logger.debug("🔍 DEBUG: Collection contient %d documents au total", collection.count())
+        
+        # DIAGNOSTIC: Vérifier l'embedding de la query
+        logger.debug("🔍 DEBUG: Query embedding: %d dimensions, début: %s", len(query_embedding), query_embedding[:3].tolist())
         
-        context_parts = []
-        for i, (image, chunk) in enumerate(zip(images, chunks), 1):
-            metadata = image['metadata']
+        # DIAGNOSTIC: Vérifier le contenu de la collection
+        try:
+            all_docs = collection.get(limit=10)
+            logger.debug("🔍 DEBUG: Collection a %d documents", len(all_docs['ids']))
             
-            context_part = f"[Image {i}] {metadata.get('original_name', 'image')}:\n"
+            # Vérifier si tous les textes sont identiques
+            sample_docs = all_docs['documents'][:5]
+            unique_texts = set()
+            for i, (doc_id, doc_text, metadata) in enumerate(zip(all_docs['ids'][:5], sample_docs, all_docs['metadatas'][:5]), 1):
+                logger.debug("🔍 DEBUG: Doc %d: ID=%s", i, doc_id)
+                logger.debug("   📝 Texte (%d chars): '%.100s...'", len(doc_text), doc_text)
+                logger.debug("   🏷️ Image ID: %s", metadata.get('image_id', 'N/A'))
+                unique_texts.add(doc_text)
             
-            if 'game_elements' in metadata:
-                context_part += f"  • Éléments: {', '.join(metadata['game_elements'])}\n"
+            logger.debug("🔍 DEBUG: Nombre de textes uniques: %d / %d", len(unique_texts), len(sample_docs))
             
-            if 'key_concepts' in metadata:
-                context_part += f"  • Concepts: {', '.join(metadata['key_concepts'])}\n"
+            if len(unique_texts) == 1:
+                logger.warning("❌ PROBLÈME IDENTIFIÉ: Tous les documents ont le même contenu textuel !")
+                logger.debug("   📝 Contenu répété: '%.150s...'", next(iter(unique_texts)))
+            elif len(unique_texts) < len(sample_docs):
+                logger.warning("⚠️ PROBLÈME PARTIEL: Seulement %d textes uniques sur %d", len(unique_texts), len(sample_docs))
+            else:
+                logger.debug("✅ Les documents ont des contenus différents")
+                
+        except Exception as e:
+            logger.error("❌ DEBUG: Erreur lecture collection: %s", e)
+    
+    @staticmethod
+    def _chunk_image_ids(metadata):
+        """Images d'un document : l'image indexée, puis celles rattachées via additional_image_ids"""
+        image_ids = [metadata['image_id']] if 'image_id' in metadata else []
+        additional_image_ids = metadata.get('additional_image_ids')
+        if additional_image_ids:
+            image_ids.extend(json.loads(additional_image_ids))
+        return image_ids
+    
+    def _log_found_chunks(self, similar_chunks):
+        """Détail des métadonnées trouvées (image référencée, aperçu du texte)"""
+        for i, chunk in enumerate(similar_chunks, 1):
+            metadata = chunk.metadata
+            image_id = metadata.get('image_id', 'inconnu')
+            
+            if 'image_path' in metadata:
+                logger.info("🖼️ Image %d: %s (%s)", i, image_id, os.path.basename(metadata['image_path']))
+            else:
+                logger.info("🖼️ Image %d: %s", i, image_id)
+            
+            # Aperçu du texte de recherche
+            searchable_preview = chunk.page_content[:80] + "..." if len(chunk.page_content) > 80 else chunk.page_content
+            logger.info("   💬 Contexte: %s", searchable_preview)
+    
+    def _log_loaded_images(self, images):
+        """Détail des images chargées (taille, éléments et concepts lus dans les métadonnées de l'ImageStore)"""
+        for i, img in enumerate(images, 1):
+            metadata = img['metadata']
+            image_size = len(img['image_data']) // 1024  # Taille approximative en KB
+            logger.info("   📄 Image %d: %s (~%dKB)", i, metadata.get('original_name', 'inconnu'), image_size)
             
-            if 'sections' in metadata and metadata['sections']:
-                section_types = [s.get('type', 'général') for s in metadata['sections']]
-                context_part += f"  • Sections: {', '.join(set(section_types))}\n"
+            # Afficher les éléments de jeu détectés
+            if metadata.get('game_elements'):
+                logger.info("   🎮 Éléments: %s", self._preview_list_field(metadata['game_elements']))
             
-            context_parts.append(context_part)
+            # Afficher les concepts clés
+            if metadata.get('key_concepts'):
+                logger.info("   💡 Concepts: %s", self._preview_list_field(metadata['key_concepts']))
+    
+    @staticmethod
+    def _preview_list_field(value):
+        """Aperçu d'un champ de métadonnées : cinq premiers éléments d'une liste, début d'un texte"""
+        if isinstance(value, list):
+            return ', '.join(map(str, value[:5])) + ('...' if len(value) > 5 else '')
+        return str(value)[:50] + "..."
+    
+    def _format_hybrid_context(self, images, chunks):
+        """Formate le contexte hybride (métadonnées + références images)"""
+        if not images or not chunks:
+            return None
+        
+        # Un document peut renvoyer plusieurs images (textes identiques) : un bloc par image chargée
+        return "\n".join(
+            self._format_image_context(i, image['metadata'])
+            for i, image in enumerate(images, 1)
+        )
+    
+    @staticmethod
+    def _format_image_context(i, metadata):
+        """Bloc de contexte d'une image : nom, puis éléments, concepts et types de sections"""
+        lines = [f"[Image {i}] {metadata.get('original_name', 'image')}:"]
+        
+        if 'game_elements' in metadata:
+            lines.append(f"  • Éléments: {', '.join(metadata['game_elements'])}")
+        
+        if 'key_concepts' in metadata:
+            lines.append(f"  • Concepts: {', '.join(metadata['key_concepts'])}")
+        
+        if 'sections' in metadata and metadata['sections']:
+            section_types = dict.fromkeys(s.get('type', 'général') for s in metadata['sections'])
+            lines.append(f"  • Sections: {', '.join(section_types)}")
         
-        return "\n".join(context_parts)
+        # Chaque bloc se termine par un saut de ligne
+        lines.append("")
+        return "\n".join(lines)
     
     def _store_simulation(self, image_ids):
         """Stockage simulation"""
@@ -548,13 +613,13 @@ class HybridRAGManager:
                 self.image_store.clear_storage("game_rules")
                 
                 # Vider simulation
-                self.analyzed_documents = []
+                self.analyzed_documents.clear()
                 
             except Exception as e:
-                print(f"❌ RAG Hybride: Erreur vidage: {e}")
+                logger.error("❌ RAG Hybride: Erreur vidage: %s", e)
                 raise e
         else:
-            print("⚠️ RAG Hybride: Pas de store à vider")
+            logger.warning("⚠️ RAG Hybride: Pas de store à vider")
     
     def get_vector_store_info(self):
         """Infos sur le store hybride"""
@@ -4,11 +4,28 @@ import base64
 from typing import Dict, List, Optional
 from pathlib import Path
 import json
+import re
+import uuid
+
+try:
+    from pybase64 import b64decode, b64encode_as_string
+except ImportError:
+    # Repli sur la bibliothèque standard si pybase64 (encodage vectorisé) n'est pas installé
+    from base64 import b64decode
+
+    def b64encode_as_string(data: bytes) -> str:
+        return base64.b64encode(data).decode('ascii')
 
 
 class ImageStoreManager:
     """Gestionnaire de stockage local d'images pour le RAG hybride"""
     
+    # Taille des tranches base64 décodées puis écrites à la suite (multiple de 4)
+    DECODE_CHUNK_SIZE = 64 * 1024
+    # Index inversé des métadonnées, dans le dossier metadata : {source_type: {terme: [image_ids]}}
+    INDEX_FILENAME = "_inverted.json"
+    _TERM_RE = re.compile(r"\w+")
+    
     def __init__(self, storage_dir: str = "./stored_images", game_name: str = None):
         self.storage_dir = Path(storage_dir)
         self.game_name = game_name or "default"
@@ -20,6 +37,13 @@ class ImageStoreManager:
         # Créer dossiers par type sous le dossier du jeu
         (self.game_dir / "game_rules").mkdir(exist_ok=True)
         (self.game_dir / "metadata").mkdir(exist_ok=True)
+        self.index_path = self.game_dir / "metadata" / self.INDEX_FILENAME
+        # Index gardé en mémoire, rechargé seulement si le fichier a changé (mtime, taille)
+        self._index_cache = None
+        self._index_signature = None
+        # Fichiers du jeu {image_id: (image, métadonnées)}, valables tant que les dossiers listés n'ont pas changé
+        self._file_map = None
+        self._file_map_mtimes = None
         
         print(f"📁 ImageStore: Dossier configuré pour {self.game_name} ({self.game_dir})")
     
@@ -28,26 +52,38 @@ class ImageStoreManager:
         Stocke une image avec ses métadonnées
         
         Args:
-            image_data: Dict avec 'data' (base64) et 'name'
+            image_data: Dict avec 'data' (base64 ou octets bruts) et 'name'
             metadata: Métadonnées extraites par l'IA
             source_type: Type de source (game_rules, question, etc.)
             
         Returns:
             image_id: ID unique de l'image stockée
         """
-        # Générer ID unique basé sur le contenu
-        content_hash = hashlib.md5(image_data['data'].encode()).hexdigest()[:12]
-        image_id = f"{source_type}_{content_hash}"
-        
-        # Chemins de stockage dans le dossier du jeu
-        image_path = self.game_dir / source_type / f"{image_id}.png"
-        metadata_path = self.game_dir / "metadata" / f"{image_id}.json"
+        # Image écrite par tranches dans un fichier temporaire, hachée au passage (BLAKE2 sur les octets
+        # bruts, 12 caractères hexadécimaux), puis renommée une fois l'ID connu
+        image_id = image_data.get('name', 'unknown')
+        hasher = hashlib.blake2b(digest_size=6)
+        tmp_path = self.game_dir / source_type / f".{uuid.uuid4().hex}.tmp"
         
         try:
             # Sauvegarder image
-            image_bytes = base64.b64decode(image_data['data'])
-            with open(image_path, 'wb') as f:
-                f.write(image_bytes)
+            with open(tmp_path, 'wb') as f:
+                for chunk in self._iter_image_bytes(image_data['data']):
+                    hasher.update(chunk)
+                    f.write(chunk)
+            
+            image_id = f"{source_type}_{hasher.hexdigest()}"
+            
+            # Chemins de stockage dans le dossier du jeu
+            image_path = self.game_dir / source_type / f"{image_id}.png"
+            metadata_path = self.game_dir / "metadata" / f"{image_id}.json"
+            os.replace(tmp_path, image_path)
+            
+            # Fiche d'un stockage précédent de la même image : ses termes sortent de l'index
+            previous_metadata = None
+            if metadata_path.exists():
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    previous_metadata = json.load(f)
             
             # Sauvegarder métadonnées enrichies
             enriched_metadata = {
@@ -62,13 +98,36 @@ class ImageStoreManager:
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(enriched_metadata, f, ensure_ascii=False, indent=2)
             
+            # Mettre à jour l'index inversé
+            index = self._load_index()
+            if previous_metadata is not None:
+                self._unindex_metadata(index, image_id, previous_metadata)
+            self._index_metadata(index, image_id, source_type, enriched_metadata)
+            self._save_index(index)
+            self._file_map = None
+            
             print(f"💾 ImageStore: Image {image_id} stockée")
             return image_id
             
         except Exception as e:
+            tmp_path.unlink(missing_ok=True)
             print(f"❌ ImageStore: Erreur stockage {image_id}: {e}")
             raise e
     
+    def _iter_image_bytes(self, raw_data):
+        """Octets de l'image : tels quels, ou décodés du base64 par tranches pour ne jamais tout matérialiser"""
+        if isinstance(raw_data, bytes):
+            yield raw_data
+            return
+        
+        # Base64 avec sauts de ligne ou longueur irrégulière : tranches non alignées, décodage en une fois
+        if len(raw_data) % 4 or '\n' in raw_data:
+            yield b64decode(raw_data)
+            return
+        
+        for start in range(0, len(raw_data), self.DECODE_CHUNK_SIZE):
+            yield b64decode(raw_data[start:start + self.DECODE_CHUNK_SIZE])
+    
     def get_image(self, image_id: str) -> Optional[Dict]:
         """
         Récupère une image et ses métadonnées par ID
@@ -77,16 +136,11 @@ class ImageStoreManager:
             Dict avec 'image_data' (base64), 'metadata', 'image_path'
         """
         try:
-            # Trouver l'image dans les différents dossiers du jeu
-            image_path = None
-            for subdir in self.game_dir.iterdir():
-                if subdir.is_dir() and subdir.name != "metadata":
-                    potential_path = subdir / f"{image_id}.png"
-                    if potential_path.exists():
-                        image_path = potential_path
-                        break
+            # L'ID est "{source_type}_{hash}" : le dossier de l'image s'en déduit directement
+            source_type = image_id.rsplit('_', 1)[0]
+            image_path = self.game_dir / source_type / f"{image_id}.png"
             
-            if not image_path or not image_path.exists():
+            if not image_path.exists():
                 print(f"⚠️ ImageStore: Image {image_id} non trouvée")
                 return None
             
@@ -96,32 +150,50 @@ class ImageStoreManager:
                 print(f"⚠️ ImageStore: Métadonnées {image_id} non trouvées")
                 return None
             
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            
-            # Charger image en base64
-            with open(image_path, 'rb') as f:
-                image_bytes = f.read()
-                image_base64 = base64.b64encode(image_bytes).decode()
-            
-            return {
-                "image_data": image_base64,
-                "metadata": metadata,
-                "image_path": str(image_path),
-                "image_id": image_id
-            }
+            return self._read_image(image_id, image_path, metadata_path)
             
         except Exception as e:
             print(f"❌ ImageStore: Erreur récupération {image_id}: {e}")
             return None
     
+    def _read_image(self, image_id: str, image_path, metadata_path) -> Dict:
+        """Charge les métadonnées et l'image en base64 depuis des chemins déjà connus"""
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        
+        # Charger image en base64
+        with open(image_path, 'rb') as f:
+            image_base64 = b64encode_as_string(f.read())
+        
+        return {
+            "image_data": image_base64,
+            "metadata": metadata,
+            "image_path": str(image_path),
+            "image_id": image_id
+        }
+    
     def get_images_by_ids(self, image_ids: List[str]) -> List[Dict]:
-        """Récupère plusieurs images par leurs IDs"""
+        """Récupère plusieurs images par leurs IDs, résolues d'après un seul listage des dossiers"""
+        try:
+            file_map = self._get_file_map()
+        except Exception as e:
+            print(f"❌ ImageStore: Erreur listage {self.game_dir}: {e}")
+            return []
+        
         images = []
         for image_id in image_ids:
-            image_data = self.get_image(image_id)
-            if image_data:
-                images.append(image_data)
+            paths = file_map.get(image_id)
+            if paths is None:
+                print(f"⚠️ ImageStore: Image {image_id} non trouvée")
+                continue
+            if paths[1] is None:
+                print(f"⚠️ ImageStore: Métadonnées {image_id} non trouvées")
+                continue
+            
+            try:
+                images.append(self._read_image(image_id, *paths))
+            except Exception as e:
+                print(f"❌ ImageStore: Erreur récupération {image_id}: {e}")
         
         print(f"📷 ImageStore: {len(images)}/{len(image_ids)} images récupérées")
         return images
@@ -133,23 +205,24 @@ class ImageStoreManager:
         Returns:
             List des image_ids correspondants
         """
-        matching_ids = []
-        metadata_dir = self.game_dir / "metadata"
-        
         try:
-            for metadata_file in metadata_dir.glob("*.json"):
-                if not metadata_file.name.startswith(source_type):
-                    continue
-                    
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                # Recherche simple par mots-clés
-                metadata_text = json.dumps(metadata, ensure_ascii=False).lower()
-                if any(term.lower() in metadata_text for term in query_terms):
-                    image_id = metadata_file.stem
-                    matching_ids.append(image_id)
+            postings = self._load_index().get(source_type, {})
             
+            # Un terme correspond aux images contenant chacun de ses mots, au moins comme partie
+            # d'un terme indexé ("carte" trouve "cartes"), comme la recherche par parcours des fiches
+            matching_ids = set()
+            for term in query_terms:
+                term_ids = None
+                for word in self._TERM_RE.findall(term.lower()):
+                    word_ids = set()
+                    for indexed_term, ids in postings.items():
+                        if word in indexed_term:
+                            word_ids.update(ids)
+                    term_ids = word_ids if term_ids is None else term_ids & word_ids
+                if term_ids:
+                    matching_ids |= term_ids
+            
+            matching_ids = sorted(matching_ids)
             print(f"🔍 ImageStore: {len(matching_ids)} images trouvées pour {query_terms}")
             return matching_ids
             
@@ -157,8 +230,114 @@ class ImageStoreManager:
             print(f"❌ ImageStore: Erreur recherche: {e}")
             return []
     
+    def _metadata_terms(self, metadata: Dict) -> set:
+        """Termes indexés d'une fiche de métadonnées (mots du JSON en minuscules)"""
+        return set(self._TERM_RE.findall(json.dumps(metadata, ensure_ascii=False).lower()))
+    
+    def _index_metadata(self, index: Dict, image_id: str, source_type: str, metadata: Dict):
+        """Ajoute l'image aux listes de ses termes"""
+        postings = index.setdefault(source_type, {})
+        for term in self._metadata_terms(metadata):
+            ids = postings.setdefault(term, [])
+            if image_id not in ids:
+                ids.append(image_id)
+    
+    def _unindex_metadata(self, index: Dict, image_id: str, metadata: Dict):
+        """Retire l'image des listes des termes d'une ancienne fiche"""
+        postings = index.get(metadata.get('source_type', 'game_rules'), {})
+        for term in self._metadata_terms(metadata):
+            ids = postings.get(term)
+            if ids and image_id in ids:
+                ids.remove(image_id)
+                if not ids:
+                    del postings[term]
+    
+    def _load_index(self) -> Dict:
+        """Index inversé en mémoire, relu si le fichier a changé, reconstruit depuis les fiches s'il n'existe pas"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            index = self._rebuild_index()
+            self._save_index(index)
+            return index
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._index_signature:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index_cache = json.load(f)
+            self._index_signature = signature
+        return self._index_cache
+    
+    def _rebuild_index(self) -> Dict:
+        """Reconstruit l'index depuis les fiches de métadonnées (stockages antérieurs à l'index)"""
+        index = {}
+        for metadata_file in (self.game_dir / "metadata").glob("*.json"):
+            if metadata_file.name == self.INDEX_FILENAME:
+                continue
+            with open(metadata_file, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            self._index_metadata(index, metadata_file.stem, metadata.get('source_type', 'game_rules'), metadata)
+        return index
+    
+    def _save_index(self, index: Dict):
+        """Écrit l'index de façon atomique (fichier temporaire puis renommage)"""
+        tmp_path = self.index_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            # L'index en mémoire a pu être modifié sans être écrit : relecture au prochain accès
+            self.clear_metadata_cache()
+            raise
+        
+        stat = os.stat(self.index_path)
+        self._index_cache = index
+        self._index_signature = (stat.st_mtime_ns, stat.st_size)
+    
+    def _get_file_map(self) -> Dict:
+        """Correspondance {image_id: (image, métadonnées)}, relistée si un des dossiers a changé"""
+        if self._file_map is not None:
+            try:
+                unchanged = all(os.stat(d).st_mtime_ns == m for d, m in self._file_map_mtimes.items())
+            except FileNotFoundError:
+                unchanged = False
+            if unchanged:
+                return self._file_map
+        
+        # mtime relevé avant chaque listage : un ajout pendant le parcours forcera un nouveau listage
+        mtimes = {self.game_dir: os.stat(self.game_dir).st_mtime_ns}
+        with os.scandir(self.game_dir) as entries:
+            subdirs = [entry.path for entry in entries if entry.is_dir()]
+        
+        image_paths, metadata_paths = {}, {}
+        for subdir in subdirs:
+            mtimes[subdir] = os.stat(subdir).st_mtime_ns
+            is_metadata = os.path.basename(subdir) == "metadata"
+            with os.scandir(subdir) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if is_metadata and ext == ".json":
+                        metadata_paths[stem] = entry.path
+                    elif not is_metadata and ext == ".png":
+                        image_paths[stem] = entry.path
+        
+        self._file_map = {
+            image_id: (path, metadata_paths.get(image_id))
+            for image_id, path in image_paths.items()
+        }
+        self._file_map_mtimes = mtimes
+        return self._file_map
+    
+    def clear_metadata_cache(self):
+        """Oublie l'index inversé et la liste des fichiers gardés en mémoire"""
+        self._index_cache = None
+        self._index_signature = None
+        self._file_map = None
+    
     def clear_storage(self, source_type: Optional[str] = None):
         """Vide le stockage (tout ou par type)"""
+        self._file_map = None
         try:
             if source_type:
                 # Vider un type spécifique
@@ -167,6 +346,11 @@ class ImageStoreManager:
                     for file in source_dir.glob("*"):
                         file.unlink()
                     print(f"🗑️ ImageStore: {source_type} vidé pour {self.game_name}")
+                
+                # Retirer ce type de l'index inversé
+                index = self._load_index()
+                if index.pop(source_type, None) is not None:
+                    self._save_index(index)
             else:
                 # Vider tout le jeu
                 for subdir in self.game_dir.iterdir():
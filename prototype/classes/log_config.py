@@ -0,0 +1,28 @@
+import logging
+import sys
+
+
+class CurrentStdoutHandler(logging.StreamHandler):
+    """Écrit dans le sys.stdout du moment : LogCapture le remplace pour le panneau debug de Streamlit"""
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter("%(message)s"))
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        # Flux figé par StreamHandler.__init__ : ignoré, on suit toujours sys.stdout
+        pass
+
+
+def configure_logger(logger: logging.Logger, debug: bool = False):
+    """Sortie console du logger d'un module, au niveau DEBUG en mode debug, INFO sinon"""
+    logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    if not any(isinstance(handler, CurrentStdoutHandler) for handler in logger.handlers):
+        logger.addHandler(CurrentStdoutHandler())
+        # Pas de double affichage si l'application configure aussi le logger racine
+        logger.propagate = False
@@ -0,0 +1,47 @@
+import pytest
+import sys
+import os
+import base64
+
+# Ajouter le chemin du prototype pour les imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from classes.image_store_manager import ImageStoreManager
+
+
+class TestImageStoreManager:
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        """ImageStore isolé dans un dossier temporaire"""
+        return ImageStoreManager(storage_dir=str(tmp_path), game_name="test_game")
+
+    @pytest.fixture
+    def image_data(self):
+        """Image factice en base64"""
+        return {"name": "page_1.png", "data": base64.b64encode(b"fake png bytes").decode()}
+
+    def test_search_finds_stored_metadata(self, store, image_data):
+        """Test qu'une image est trouvée par un mot de ses métadonnées, même partiel"""
+        image_id = store.store_image(image_data, {"game_elements": ["cartes", "plateau"]})
+
+        assert store.search_images_by_metadata(["carte"]) == [image_id]
+        assert store.search_images_by_metadata(["dés"]) == []
+
+    def test_restore_replaces_indexed_terms(self, store, image_data):
+        """Test qu'un nouveau stockage de la même image remplace les termes de l'ancienne fiche"""
+        image_id = store.store_image(image_data, {"game_elements": ["cartes"]})
+        assert store.store_image(image_data, {"x": 1}) == image_id
+
+        assert store.search_images_by_metadata(["cartes"]) == []
+        assert store.search_images_by_metadata(["x"]) == [image_id]
+
+    def test_restore_replaces_terms_after_reload(self, store, image_data, tmp_path):
+        """Test que la régression est couverte aussi quand l'index est relu depuis le disque"""
+        image_id = store.store_image(image_data, {"game_elements": ["cartes"]})
+
+        other_store = ImageStoreManager(storage_dir=str(tmp_path), game_name="test_game")
+        other_store.store_image(image_data, {"x": 1})
+
+        assert store.search_images_by_metadata(["cartes"]) == []
+        assert store.search_images_by_metadata(["x"]) == [image_id]